@@ -0,0 +1,319 @@
+"""
+    Fake Leetcode server for load testing the bot without hitting leetcode.com
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class FakeLeetcode:
+    """
+    Synthetic Leetcode data, answering the queries built by `QueryBuilder` and
+    the `/api/problems/all/` catalog.
+
+    Users are named `user0` to `user<users - 1>`, any other username doesn't
+    exist. The data of every user is derived from `seed` and their name, so
+    the same options always serve the same data.
+    """
+
+    # Submissions are dated back from here, one hour apart
+    EPOCH = 1700000000
+
+    def __init__(self, questions: int = 3000, users: int = 100, seed: int = 0):
+        self.users = users
+        self.seed = seed
+        rng = random.Random(seed)
+        self.questions = [
+            {
+                "id": question_id,
+                "title": f"Question {question_id}",
+                "title_slug": f"question-{question_id}",
+                "difficulty": rng.choice([1, 2, 3]),
+                "paid_only": rng.random() < 0.2,
+            }
+            for question_id in range(1, questions + 1)
+        ]
+        self.catalog = json.dumps({
+            "stat_status_pairs": [
+                {
+                    "stat": {
+                        "question_id": question["id"],
+                        "question__title": question["title"],
+                        "question__title_slug": question["title_slug"],
+                    },
+                    "difficulty": {"level": question["difficulty"]},
+                    "paid_only": question["paid_only"],
+                }
+                for question in self.questions
+            ]
+        }).encode()
+        self.catalog_etag = f'"{hashlib.sha256(self.catalog).hexdigest()[:32]}"'
+
+    def _user_random(self, username: str) -> Optional[random.Random]:
+        match = re.fullmatch(r"user(\d+)", username or "")
+        if match is None or int(match.group(1)) >= self.users:
+            return None
+        return random.Random(zlib.crc32(username.encode()) ^ self.seed)
+
+    def recent_submissions(self, username: str, limit: int) -> Optional[list]:
+        """
+        Answers `recentAcSubmissionList`
+        """
+        rng = self._user_random(username)
+        if rng is None:
+            return None
+        solved = rng.sample(self.questions, min(limit, len(self.questions)))
+        return [
+            {
+                "id": str(rng.randrange(10 ** 9)),
+                "title": question["title"],
+                "titleSlug": question["title_slug"],
+                "timestamp": str(self.EPOCH - index * 3600),
+            }
+            for index, question in enumerate(solved)
+        ]
+
+    def user_profile(self, username: str) -> Optional[dict]:
+        """
+        Answers `matchedUser` of the `getUserProfile` query
+        """
+        rng = self._user_random(username)
+        if rng is None:
+            return None
+        counts = {difficulty: rng.randrange(300) for difficulty in ("Easy", "Medium", "Hard")}
+        counts["All"] = sum(counts.values())
+        submissions = [
+            {"difficulty": difficulty, "count": count, "submissions": count * 2}
+            for difficulty, count in counts.items()
+        ]
+        return {
+            "contributions": {"points": rng.randrange(1000)},
+            "profile": {"reputation": rng.randrange(100), "ranking": rng.randrange(1, 10 ** 6)},
+            "submissionCalendar": "{}",
+            "submitStats": {"acSubmissionNum": submissions, "totalSubmissionNum": submissions},
+        }
+
+    def solution_topics(self, username: str, skip: int, first: int) -> Optional[dict]:
+        """
+        Answers `userSolutionTopics`
+        """
+        rng = self._user_random(username)
+        if rng is None:
+            return None
+        total = rng.randrange(50)
+        user_index = int(username[len("user"):])
+        edges = [
+            {
+                "node": {
+                    "id": str(user_index * 1000 + index),
+                    "title": f"Solution {index} by {username}",
+                    "url": f"/problems/question-{index + 1}/solutions/{index}/",
+                    "viewCount": index,
+                    "questionTitle": f"Question {index + 1}",
+                    "post": {"creationDate": self.EPOCH - index * 3600, "voteCount": index},
+                }
+            }
+            for index in range(skip, min(skip + first, total))
+        ]
+        return {"pageInfo": {"hasNextPage": skip + first < total}, "edges": edges}
+
+    def solution(self, topic_id: int) -> dict:
+        """
+        Answers `topic` of the `communitySolution` query
+        """
+        return {
+            "id": topic_id,
+            "title": f"Solution {topic_id}",
+            "solutionTags": [{"name": "Python3", "slug": "python3"}],
+            "post": {
+                "id": topic_id,
+                "content": f"class Solution:\n    def solve(self):\n        return {topic_id}\n",
+                "creationDate": self.EPOCH,
+            },
+        }
+
+    def graphql(self, body: dict) -> dict:
+        """
+        Answers a GraphQL request, dispatched on the name of its operation
+        """
+        match = re.search(r"query\s+(\w+)", body.get("query", ""))
+        operation = match.group(1) if match else ""
+        variables = body.get("variables") or {}
+        if operation == "recentAcSubmissions":
+            return self._user_result(
+                "recentAcSubmissionList",
+                self.recent_submissions(variables.get("username"), variables.get("limit", 20)),
+            )
+        if operation == "recentAcSubmissionsBatch":
+            data = {
+                alias: self.recent_submissions(username, variables.get("limit", 20))
+                for alias, username in variables.items()
+                if re.fullmatch(r"u\d+", alias)
+            }
+            errors = [
+                {"message": "That user does not exist.", "path": [alias]}
+                for alias, submissions in data.items() if submissions is None
+            ]
+            return {"data": data, "errors": errors} if errors else {"data": data}
+        if operation == "getUserProfile":
+            return self._user_result("matchedUser", self.user_profile(variables.get("username")))
+        if operation == "userSolutionTopics":
+            return self._user_result("userSolutionTopics", self.solution_topics(
+                variables.get("username"), variables.get("skip") or 0, variables.get("first") or 0
+            ))
+        if operation == "communitySolution":
+            return {"data": {"topic": self.solution(variables.get("topicId"))}}
+        return {"errors": [{"message": f"Unknown operation `{operation}`"}]}
+
+    @staticmethod
+    def _user_result(field: str, result) -> dict:
+        if result is None:
+            return {"data": {field: None}, "errors": [{"message": "That user does not exist."}]}
+        return {"data": {field: result}}
+
+
+class FakeLeetcodeServer(ThreadingHTTPServer):
+    """
+    HTTP server serving a `FakeLeetcode`, delaying every response by the
+    configured latency and failing a share of the requests with 500s and 429s
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, fake: FakeLeetcode, options: argparse.Namespace):
+        super().__init__(address, FakeLeetcodeHandler)
+        self.fake = fake
+        self.options = options
+        self.random = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.status_counts = {}
+
+    def pick_fault(self) -> Optional[int]:
+        """
+        Sleeps for the configured latency, then decides whether the request fails
+        """
+        with self.lock:
+            delay = max(self.random.gauss(self.options.latency, self.options.jitter), 0)
+            roll = self.random.random()
+        time.sleep(delay / 1000)
+        if roll < self.options.throttle_rate:
+            return 429
+        if roll < self.options.throttle_rate + self.options.error_rate:
+            return 500
+        return None
+
+    def count(self, status: int) -> None:
+        """
+        Counts the responses sent per status code
+        """
+        with self.lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+
+class FakeLeetcodeHandler(BaseHTTPRequestHandler):
+    """
+    Request handler of `FakeLeetcodeServer`. The bot sends its GraphQL queries
+    as GET requests with a JSON body, so both GET and POST are answered.
+    """
+
+    server: FakeLeetcodeServer
+    # Keep connections alive like leetcode.com, so connection reuse can be measured
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """
+        Answers a request to the catalog or the GraphQL API
+        """
+        # Read the whole request even if it fails, the connection is reused
+        length = int(self.headers.get("Content-Length") or 0)
+        request_body = self.rfile.read(length)
+        fault = self.server.pick_fault()
+        if fault is not None:
+            headers = {"Retry-After": str(self.server.options.retry_after)} if fault == 429 else {}
+            self._send(fault, {"errors": [{"message": "Injected failure"}]}, headers)
+        elif self.path.rstrip("/") == "/api/problems/all":
+            if self.headers.get("If-None-Match") == self.server.fake.catalog_etag:
+                self._send(304, None, {"ETag": self.server.fake.catalog_etag})
+            else:
+                self._send(200, self.server.fake.catalog, {"ETag": self.server.fake.catalog_etag})
+        elif self.path.rstrip("/") == "/graphql":
+            try:
+                body = json.loads(request_body or b"{}")
+            except ValueError:
+                self._send(400, {"errors": [{"message": "Invalid JSON"}]})
+                return
+            self._send(200, self.server.fake.graphql(body))
+        else:
+            self._send(404, {"errors": [{"message": f"Unknown path `{self.path}`"}]})
+
+    do_POST = do_GET
+
+    def _send(self, status: int, body, headers: Optional[dict] = None) -> None:
+        payload = body if isinstance(body, bytes) or body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload or b"")))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+        self.server.count(status)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+
+if __name__ == "__main__":
+    command_parser = argparse.ArgumentParser(
+        prog="Fake Leetcode server",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="""\
+    Serves synthetic Leetcode data for load testing. Point the bot at it with
+    LEETCODE_BASE_URL="http://127.0.0.1:8080" in .process.env""",
+    )
+    command_parser.add_argument("--host", default="127.0.0.1")
+    command_parser.add_argument("--port", type=int, default=8080)
+    command_parser.add_argument("--questions", type=int, default=3000,
+                                help="Questions in the catalog")
+    command_parser.add_argument("--users", type=int, default=100,
+                                help="Users that exist, named user0, user1, ...")
+    command_parser.add_argument("--seed", type=int, default=0,
+                                help="Seed of the synthetic data and the injected faults")
+    command_parser.add_argument("--latency", type=float, default=0,
+                                help="Mean latency added to every response, in milliseconds")
+    command_parser.add_argument("--jitter", type=float, default=0,
+                                help="Standard deviation of the added latency, in milliseconds")
+    command_parser.add_argument("--error-rate", type=float, default=0,
+                                help="Share of requests failing with a 500")
+    command_parser.add_argument("--throttle-rate", type=float, default=0,
+                                help="Share of requests failing with a 429")
+    command_parser.add_argument("--retry-after", type=int, default=1,
+                                help="Retry-After seconds sent with a 429")
+    command_parser.add_argument("--verbose", action="store_true", help="Log every request")
+    server_options = command_parser.parse_args()
+
+    fake_leetcode = FakeLeetcode(
+        server_options.questions, server_options.users, server_options.seed
+    )
+    fake_server = FakeLeetcodeServer(
+        (server_options.host, server_options.port), fake_leetcode, server_options
+    )
+    print(f"Serving fake Leetcode on http://{server_options.host}:{fake_server.server_port}")
+    try:
+        fake_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake_server.server_close()
+        print(f"Responses by status: {fake_server.status_counts}")
@@ -5,8 +5,11 @@
 import argparse
 from dotenv import dotenv_values
 
+from utils.catalog_sync import CatalogSync
 from utils.database.database_util import DatabaseUtil
+from utils.database.sqlite.migrate import migrate_from_tinydb
 from utils.discord_util import DiscordUtil
+from utils.leetcode_session import RATE_LIMITER
 from utils.leetcode_util import LeetcodeUtil
 from utils.standalone_util import StandaloneUtil
 
@@ -17,12 +20,38 @@ if __name__ == "__main__":
     config = dotenv_values(".process.env")
     DISCORD_AUTH_TOKEN = config.get("DISCORD_AUTH_TOKEN")
     CHANNEL_ID = config.get("CHANNEL_ID")
-    database = DatabaseUtil(config.get("DATABASE_NAME"))
-    leetcode = LeetcodeUtil()
+    database = DatabaseUtil(
+        config.get("DATABASE_NAME"),
+        backend=config.get("DATABASE_BACKEND") or "tinydb",
+        write_behind=config.get("DATABASE_WRITE_BEHIND", "").lower() == "true",
+        flush_interval=float(config.get("DATABASE_FLUSH_INTERVAL") or 5),
+        flush_writes=int(config.get("DATABASE_FLUSH_WRITES") or 100),
+        completions_log=config.get("DATABASE_COMPLETIONS_LOG", "").lower() == "true",
+        compact_every=int(config.get("DATABASE_COMPACT_EVERY") or 1000),
+    )
+    if config.get("QUESTION_POOL_SEED"):
+        database.question_pool.reseed(int(config.get("QUESTION_POOL_SEED")))
+    # One rate limit for all requests of the process to Leetcode
+    RATE_LIMITER.configure(
+        rate=float(config.get("LEETCODE_RATE") or 5),
+        burst=int(config.get("LEETCODE_BURST") or 10),
+    )
+    leetcode = LeetcodeUtil(
+        pool_size=int(config.get("LEETCODE_POOL_SIZE") or 10),
+        max_retries=int(config.get("LEETCODE_MAX_RETRIES") or 3),
+        max_workers=int(config.get("LEETCODE_MAX_WORKERS") or 8),
+        batch_size=int(config.get("LEETCODE_BATCH_SIZE") or 10),
+        rank_cache_ttl=float(config.get("LEETCODE_RANK_CACHE_TTL") or 300),
+        rank_cache_size=int(config.get("LEETCODE_RANK_CACHE_SIZE") or 1024),
+        base_url=config.get("LEETCODE_BASE_URL") or LeetcodeUtil.BASE_URL,
+        failure_threshold=int(config.get("LEETCODE_FAILURE_THRESHOLD") or 5),
+        probe_interval=float(config.get("LEETCODE_PROBE_INTERVAL") or 30),
+    )
+    catalog_sync = CatalogSync(database, leetcode)
 
     command_parser = argparse.ArgumentParser(
         prog="TrainingWheels Bot",
-        usage="leetcode_bot.py [--discord] [--update]",
+        usage="leetcode_bot.py [--discord] [--update] [--migrate-from TINYDB_PATH]",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         description="""\
     TrainingWheels Bot.
@@ -43,18 +72,43 @@ if __name__ == "__main__":
         help="Update the database with new Leetcode questions",
     )
 
+    command_parser.add_argument(
+        "--migrate-from",
+        metavar="TINYDB_PATH",
+        help="Copy an existing TinyDB database file into the SQLite database",
+    )
+
     args = command_parser.parse_args()
 
+    if args.migrate_from:
+        if config.get("DATABASE_BACKEND") != "sqlite":
+            command_parser.error("--migrate-from requires DATABASE_BACKEND=\"sqlite\"")
+        print(f"Migrating {args.migrate_from} into {config.get('DATABASE_NAME')}...")
+        migrated = migrate_from_tinydb(args.migrate_from, database.db)
+        for table_name, count in migrated.items():
+            print(f"Migrated {count} rows into {table_name}")
+
     if args.update:
         print("Updating Leetcode questions in our database...")
-        new_questions = leetcode.api_questions_loadall()
-        count = database.leetcode_questions.insert_many(new_questions)
-        print(f"Inserted {count} new questions into the database")
+        counts = catalog_sync.refresh()
+        if counts is None:
+            print("Unable to download the Leetcode questions")
+        else:
+            print(
+                f"Inserted {counts['new']} new questions, updated {counts['changed']}"
+                f" changed questions, removed {counts['removed']} questions,"
+                f" {counts['unchanged']} questions unchanged"
+            )
 
     if args.discord:
         print("Running in Discord mode")
         bot = DiscordUtil(
-            database=database, token=DISCORD_AUTH_TOKEN, channel_id=CHANNEL_ID, leetcode=leetcode
+            database=database, token=DISCORD_AUTH_TOKEN, channel_id=CHANNEL_ID, leetcode=leetcode,
+            catalog_sync=catalog_sync,
+            catalog_refresh_interval=float(config.get("CATALOG_REFRESH_INTERVAL") or 0),
+            completion_poll_interval=float(config.get("COMPLETION_POLL_INTERVAL") or 0),
+            command_workers=int(config.get("COMMAND_WORKERS") or 8),
+            command_concurrency=int(config.get("COMMAND_CONCURRENCY") or 2),
         )
     else:
         bot = StandaloneUtil(database=database, leetcode=leetcode)
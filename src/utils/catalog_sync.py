@@ -0,0 +1,99 @@
+"""
+Catalog Sync module
+"""
+
+from typing import Dict, Optional, Tuple
+import requests
+
+from .database.database_util import DatabaseUtil
+from .leetcode_util import LeetcodeUtil
+
+class CatalogSync:
+    """
+    Keeps the Leetcode_Question table in sync with the Leetcode catalog.
+
+    The validators of the last download are stored in the Catalog_Sync table so
+    the next refresh can send a conditional request. When the catalog changed,
+    only the difference with the table is written: new, changed and removed
+    questions, together with the new validators in one transaction.
+    """
+
+    FIELDS = ["etag", "last_modified", "content_hash"]
+
+    def __init__(self, database: DatabaseUtil, leetcode: LeetcodeUtil):
+        self.database = database
+        self.leetcode = leetcode
+
+    def fetch(self) -> Tuple[Optional[dict], Optional[dict]]:
+        """
+        Downloads the catalog if it changed since the last refresh and compares it
+        with the Leetcode_Question table. Questions are compared as they are parsed
+        from the download against a copy of the table taken up front, so only that
+        copy and the change set are kept in memory. Nothing is written to the
+        database, so this can run on a worker thread.
+
+        Returns the change set, or None if the catalog is unchanged or the
+        download failed, and the validators of the download, or None if it failed.
+        """
+        with self.database.lock:
+            stored_validators = self.database.catalog_sync.load(self.leetcode.all_problems_url)
+            # Other threads change the table and its index meanwhile
+            existing = self.database.leetcode_questions.snapshot()
+        questions, validators = self.leetcode.api_questions_load_changed(stored_validators)
+        if questions is None:
+            return None, validators
+        try:
+            changes = self.database.leetcode_questions.diff(questions, existing)
+        except (ValueError, KeyError, TypeError, requests.RequestException) as error:
+            print(f"Unable to read the Leetcode catalog: {error!r}")
+            return None, None
+        if not changes["unchanged"] and not changes["new"] and not changes["changed"]:
+            # Never empty the catalog because of a bad download
+            return None, None
+        if validators["content_hash"] == (stored_validators or {}).get("content_hash") and not (
+            changes["new"] or changes["changed"] or changes["removed"]
+        ):
+            # The same catalog as the last refresh, sent by a server ignoring the
+            # conditional request, and the table still matches it. A table that
+            # drifted from the catalog is repaired even if the catalog didn't change.
+            return None, validators
+        return changes, validators
+
+    def apply(self, changes: Optional[dict], validators: Optional[dict]
+              ) -> Optional[Dict[str, int]]:
+        """
+        Writes the result of `fetch` to the database.
+
+        Returns the number of `new`, `changed`, `removed` and `unchanged`
+        questions, or None if the download failed.
+        """
+        if validators is None:
+            return None
+        sync_state = {
+            "url": self.leetcode.all_problems_url,
+            **{field: validators.get(field) for field in self.FIELDS},
+        }
+        changes = changes or {"new": [], "changed": [], "removed": []}
+        counts = {key: len(changes[key]) for key in ("new", "changed", "removed")}
+        with self.database.lock:
+            if any(counts.values()) or (
+                self.database.catalog_sync.load(sync_state["url"]) != sync_state
+            ):
+                with self.database.transaction():
+                    if any(counts.values()):
+                        self.database.leetcode_questions.apply_changes(changes)
+                    self.database.catalog_sync.save(sync_state)
+                if any(counts.values()):
+                    self.database.notify_catalog_change()
+            # Without a change set the catalog wasn't downloaded, so nothing changed
+            counts["unchanged"] = (
+                changes["unchanged"] if "unchanged" in changes
+                else len(self.database.leetcode_questions.loadall())
+            )
+        return counts
+
+    def refresh(self) -> Optional[Dict[str, int]]:
+        """
+        Downloads the catalog and writes the changes to the database
+        """
+        return self.apply(*self.fetch())
@@ -0,0 +1,89 @@
+"""
+Command Runner module
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class CommandRunner:
+    """
+    Runs the blocking command handlers of the Discord bot on a pool of worker
+    threads, so the event loop keeps answering the Discord gateway meanwhile.
+
+    At most `per_command_limit` calls of the same command run at once. Further
+    calls wait their turn on the event loop, without holding a worker. How late
+    the event loop wakes up from a sleep of `lag_interval` seconds is sampled
+    as its lag.
+    """
+
+    def __init__(self, max_workers: int = 8, per_command_limit: int = 2,
+                 lag_interval: float = 1.0):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        self.per_command_limit = per_command_limit
+        self.lag_interval = lag_interval
+        # Created on the event loop, they are only used from there
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.counters = {
+            "commands_run": 0,
+            "commands_running": 0,
+            "commands_queued": 0,
+            "event_loop_lag_ms": 0,
+            "max_event_loop_lag_ms": 0,
+        }
+        self.lag_task: Optional[asyncio.Task] = None
+
+    async def run(self, name: str, func: Callable[..., Any], **kwargs) -> Any:
+        """
+        Calls `func(**kwargs)` on a worker thread once fewer than
+        `per_command_limit` calls of the command `name` are running
+        """
+        if name not in self.semaphores:
+            self.semaphores[name] = asyncio.Semaphore(self.per_command_limit)
+        semaphore = self.semaphores[name]
+        if semaphore.locked():
+            self.counters["commands_queued"] += 1
+        async with semaphore:
+            self.counters["commands_running"] += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, functools.partial(func, **kwargs))
+            finally:
+                self.counters["commands_running"] -= 1
+                self.counters["commands_run"] += 1
+
+    def start(self) -> None:
+        """
+        Starts sampling the event loop lag. Must be called from the event loop.
+        """
+        if self.lag_task is None:
+            self.lag_task = asyncio.get_running_loop().create_task(self._monitor_lag())
+
+    async def _monitor_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag_ms = int(max(loop.time() - started - self.lag_interval, 0) * 1000)
+            self.counters["event_loop_lag_ms"] = lag_ms
+            self.counters["max_event_loop_lag_ms"] = max(
+                self.counters["max_event_loop_lag_ms"], lag_ms
+            )
+
+    def stop(self) -> None:
+        """
+        Stops sampling the event loop lag and shuts the worker threads down once
+        the running commands finish
+        """
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            self.lag_task = None
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Gathers the command counters and the latest and highest event loop lag
+        """
+        return dict(self.counters)
@@ -17,6 +17,7 @@ class BotCommand:
         "!status",
         "!new-challenge",
         "!group-status",
+        "!metrics",
     ]
 
     def __init__(self, issuer: str, action: str, kwargs: dict, errors: List[str]):
@@ -79,3 +79,10 @@ class CommandAbstract(ABC):
         in the current challenge
         """
         pass
+
+    @abstractmethod
+    def _metrics(self) -> str:
+        """
+        Summarizes performance counters of the bot, such as Leetcode connection reuse
+        """
+        pass
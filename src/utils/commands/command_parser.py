@@ -92,6 +92,16 @@ class CommandParser:
 
         return BotCommand(issuer, action, kwargs, errors)
 
+    def validate_cmd_metrics(self, issuer: str, action: str, args: str, errors: List[str]):
+        """
+        Validates the metrics command
+        """
+        kwargs = {}
+        if args:
+            errors.append("Invalid argument count for command metrics")
+
+        return BotCommand(issuer, action, kwargs, errors)
+
     def parse(self, command: str, issuer: str) -> BotCommand:
         """
         Parses and validates a given command
@@ -1,8 +1,10 @@
 """
 Command Utility module
 """
-import random
+import functools
 from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import requests
 
 #from .command_abc import CommandAbstract
 from ..database.database_util import DatabaseUtil
@@ -10,6 +12,20 @@ from ..leetcode_util import LeetcodeUtil
 from ..emojis import Emojis
 from ..misc.maps import QUESTION_DIFFICULTY_MAP
 
+def holds_database_lock(func):
+    """
+    Runs a CommandUtil method with the database lock held, for commands that
+    only use the database. Commands calling Leetcode hold the lock around their
+    database access only, so other commands don't wait for Leetcode.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.database.lock:
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
 class CommandUtil():
     """
     An interface for classes that will support leetcode bot commands
@@ -24,7 +40,9 @@ Supported commands:
 !status                 -   Display user's completion status of current weekly challenge
 !new-challenge          -   Generate a new Weekly Challenge
 !group-status           -   Display all users' completion status of current weekly challenge
+!metrics                -   Display performance counters of the bot
 """
+    STALE_MESSAGE = "_Leetcode is unreachable, showing the completions recorded so far_\n"
 
     def __init__(self, database: DatabaseUtil, leetcode: LeetcodeUtil, discord_mode=False):
         self.database = database
@@ -32,7 +50,17 @@ Supported commands:
         self.leetcode = leetcode
         self.reaction_complete = Emojis.check_mark if discord_mode else "Complete"
         self.reaction_incomplete = Emojis.red_x if discord_mode else "Incomplete"
+        # Rendered `challenge` output by (challenge id, discord mode)
+        self.challenge_cache = {}
+        # A CompletionPoller refreshing completions in the background, if any
+        self.poller = None
+        self.database.add_challenge_listener(
+            lambda event, challenge_id, questions: self.challenge_cache.clear()
+        )
+        # Challenges are rendered with the current titles and difficulties of the catalog
+        self.database.add_catalog_listener(self.challenge_cache.clear)
 
+    @holds_database_lock
     def claim(self, discord_id: str, leetcode_id: str) -> str:
         """
         Associates a leetcode_id with a discord_id in the Leetcode_User table.
@@ -64,12 +92,15 @@ Supported commands:
         if create_user:
             user = {"discord_id": discord_id, "leetcode_id": leetcode_id}
             success = self.database.users.insert(user)
+            # Claims must survive a restart even with write-behind storage
+            self.database.flush()
             if success:
                 message += f"Leetcode Username `{leetcode_id}` successfully claimed!\n"
             else:
                 message += f"Error: {leetcode_id} already in use!\n"
         return message
 
+    @holds_database_lock
     def challenge(self) -> str:
         """
         Determines the current weekly challenge.
@@ -78,16 +109,21 @@ Supported commands:
         """
         latest = self.database.weekly_challenges.get_latest()
         if latest:
+            cache_key = (latest["id"], self.discord_mode)
+            if cache_key in self.challenge_cache:
+                return self.challenge_cache[cache_key]
             start_date = datetime.fromtimestamp(latest["date"])
             result = f"* * * CHALLENGE {latest['id']} | {start_date.date()} * * *\n\n"
             questions = self.database.weekly_questions.load_by_challenge_id(latest["id"])
             for q in questions:
-                question = self.database.leetcode_questions.load(q["id"])
+                # Weekly questions hold a copy of the question in case it left the catalog
+                question = self.database.leetcode_questions.load(q["id"]) or q
                 result += f"Question:\t{question['title']}\n"
                 result += (
                     f"Difficulty:\t{QUESTION_DIFFICULTY_MAP[question['difficulty']]}\n"
                 )
                 result += f"URL:\t\t<https://leetcode.com/problems/{question['title_slug']}/>\n\n"
+            self.challenge_cache[cache_key] = result
         else:
             result = "There are no challenges at this time"
         return result
@@ -98,7 +134,8 @@ Supported commands:
         Calls the `rank`/`stats` leetcode API and returns results.
         No database required.
         """
-        user = self.database.users.load_by_discord_id(discord_id)
+        with self.database.lock:
+            user = self.database.users.load_by_discord_id(discord_id)
         if user:
             leetcode_user_id = user["leetcode_id"]
             result = self.leetcode.get_user_rank(leetcode_user_id)
@@ -116,33 +153,100 @@ Supported commands:
         call, inserts any new completions to Question Completions database table,
         and returns True to show an update was run.
         """
-        completions = self.database.question_completions.load_all_title_slugs_by_user(leetcode_id)
-        questions = self.database.weekly_questions.load_all_title_slugs_by_challenge(challenge_id)
-        completed_in_database = list(set(completions) & set(questions))
-        if len(completed_in_database) < len(questions):
-            submissions = self.leetcode.get_recent_submissions(leetcode_id)
-            self.database.question_completions.insert_many(leetcode_id, submissions)
-            return True
-        return False
+        return self.update_users_completions([leetcode_id], challenge_id) > 0
+
+    def update_users_completions(self, leetcode_ids: List[str], challenge_id: str,
+                                 on_batch: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Runs update_user_completions for several users. The API calls of all users
+        needing an update are sent concurrently, and their results are inserted in
+        the order of `leetcode_ids`. Returns the number of users updated.
+
+        With `on_batch`, users are fetched one batch at a time, as many as Leetcode
+        is sent in parallel, and `on_batch` is called with the number of users
+        fetched so far and the number to fetch before each batch.
+        """
+        stale_ids = []
+        with self.database.lock:
+            questions = set(self.database.weekly_questions.load_all_title_slugs_by_challenge(
+                challenge_id))
+            for leetcode_id in leetcode_ids:
+                completions = self.database.question_completions.load_all_title_slugs_by_user(
+                    leetcode_id)
+                completed_in_database = set(completions) & questions
+                if len(completed_in_database) < len(questions):
+                    stale_ids.append(leetcode_id)
+        batch_size = len(stale_ids)
+        if on_batch:
+            batch_size = self.leetcode.batch_size * self.leetcode.max_workers
+        for start in range(0, len(stale_ids), max(batch_size, 1)):
+            if on_batch:
+                on_batch(start, len(stale_ids))
+            batch = stale_ids[start:start + batch_size]
+            submissions = self.leetcode.get_recent_submissions_many(batch)
+            for leetcode_id in batch:
+                self.database.ingest_submissions(leetcode_id, submissions[leetcode_id])
+        return len(stale_ids)
+
+    def refresh_completions(self, leetcode_ids: List[str], challenge_id: str,
+                            on_batch: Optional[Callable[[int, int], None]] = None) -> bool:
+        """
+        Runs update_users_completions unless Leetcode is unreachable. Returns False
+        if the completions in the database could not be brought up to date.
+        """
+        if not self.leetcode.is_available():
+            return False
+        try:
+            self.update_users_completions(leetcode_ids, challenge_id, on_batch)
+        except requests.RequestException:
+            return False
+        if self.poller:
+            # Every user is either complete in the database or was just fetched
+            self.poller.mark_refreshed(leetcode_ids, challenge_id)
+        return True
+
+    def sync_completions(self, leetcode_ids: List[str], challenge_id: str,
+                         on_batch: Optional[Callable[[int, int], None]] = None) -> str:
+        """
+        Makes sure the completions of users in the database can be shown. If the
+        poller refreshed all of them for the challenge, the database is used as is,
+        otherwise refresh_completions runs now. Returns a note to show with the
+        completions: when they were last refreshed, or that they are stale.
+        """
+        refreshed_at = None
+        if self.poller:
+            refreshed_at = self.poller.last_refreshed(leetcode_ids, challenge_id)
+        if refreshed_at is None:
+            fresh = self.refresh_completions(leetcode_ids, challenge_id, on_batch)
+            return "" if fresh else self.STALE_MESSAGE
+        if self.discord_mode:
+            # Shown by Discord in the reader's time zone, e.g. "5 minutes ago"
+            return f"_Last refreshed <t:{int(refreshed_at)}:R>_\n"
+        refreshed_date = datetime.fromtimestamp(refreshed_at)
+        return f"_Last refreshed {refreshed_date.strftime('%Y-%m-%d %H:%M:%S')}_\n"
 
     def status(self, discord_id: str) -> str:
         """
         Determines the completion status of each question in the current
-        weekly challenge for the given leetcode_user_id. Calls update_user_completions to check
+        weekly challenge for the given leetcode_user_id. Calls sync_completions to check
         database for completions and updates via leetcode API ONLY if necessary. Gathers the list
-        of current weekly challenges from the database.
+        of current weekly challenges from the database. If Leetcode is unreachable, the
+        completions recorded so far are shown, marked as stale.
         """
         result = ""
-        user = self.database.users.load_by_discord_id(discord_id)
-        if user:
+        with self.database.lock:
+            user = self.database.users.load_by_discord_id(discord_id)
             challenge = self.database.weekly_challenges.get_latest()
+        if user:
             if challenge:
                 user_leetcode_id = user["leetcode_id"]
-                self.update_user_completions(user_leetcode_id, challenge["id"])
-                completions = self.database.question_completions.load_all_title_slugs_by_user(
-                    user_leetcode_id
-                    )
-                questions = self.database.weekly_questions.load_by_challenge_id(challenge["id"])
+                note = self.sync_completions([user_leetcode_id], challenge["id"])
+                with self.database.lock:
+                    completions = self.database.question_completions.load_all_title_slugs_by_user(
+                        user_leetcode_id
+                        )
+                    questions = self.database.weekly_questions.load_by_challenge_id(
+                        challenge["id"])
                 question_slugs = [q['title_slug'] for q in questions]
                 completed_in_database = list(set(completions) & set(question_slugs))
                 total_completions = len(completed_in_database)
@@ -155,6 +259,7 @@ Supported commands:
                         f"\t{self.reaction_complete if complete else self.reaction_incomplete}"
                         f"\t-\t{question['title']}\n"
                     )
+                result += note
             else:
                 result += "No current challenges"
         else:
@@ -162,14 +267,19 @@ Supported commands:
             result += " `!claim <leetcode_username>`"
         return result
 
-    def group_status(self) -> str:
+    def group_status(self, on_progress: Optional[Callable[[str], None]] = None) -> str:
         """
         Calculates and summarizes the number of users who have completed each question
-        in the current challenge
+        in the current challenge. Calls sync_completions to bring the completions of
+        all users up to date first.
+
+        If users have to be fetched from Leetcode, `on_progress` is called with a
+        partial summary before each batch of users is fetched.
         """
         result = ""
-        users = self.database.users.loadall()
-        challenge = self.database.weekly_challenges.get_latest()
+        with self.database.lock:
+            users = self.database.users.loadall()
+            challenge = self.database.weekly_challenges.get_latest()
         if not challenge:
             result += "No current challenge"
         elif len(users) == 0:
@@ -177,68 +287,80 @@ Supported commands:
         else:
             date = datetime.fromtimestamp(challenge["date"])
             result += f"**Challenge {challenge['id']} | {date.strftime('%Y-%m-%d')}**\n\n"
-            questions = self.database.weekly_questions.load_by_challenge_id(challenge["id"])
-            user_scores = { user["leetcode_id"] : 0 for user in users }
+            with self.database.lock:
+                questions = self.database.weekly_questions.load_by_challenge_id(challenge["id"])
             if len(questions) == 0:
-                result += "Current challenge is empty"
+                result += "Current challenge is empty\n\n"
             else:
-                total_completions = 0
-                completions_map = {}
-                for user in users:
-                    self.update_user_completions(user["leetcode_id"], challenge["id"])
-                    completions = self.database.question_completions.load_all_title_slugs_by_user(
+                header = result
+
+                def report_progress(fetched: int, total: int) -> None:
+                    on_progress(
+                        f"{header}_Fetching completions of users: {fetched}/{total}_\n\n"
+                        f"{self._group_summary(users, questions)}"
+                    )
+
+                note = self.sync_completions(
+                    [user["leetcode_id"] for user in users], challenge["id"],
+                    report_progress if on_progress else None,
+                )
+                result += f"{note}\n" if note else ""
+                result += self._group_summary(users, questions)
+        return result
+
+    def _group_summary(self, users: List[dict], questions: List[dict]) -> str:
+        """
+        Summarizes the completions of each question recorded in the database,
+        followed by the stars each user earned
+        """
+        result = ""
+        total_completions = 0
+        completions_map = {}
+        user_scores = { user["leetcode_id"] : 0 for user in users }
+        with self.database.lock:
+            for user in users:
+                completions_map[user["leetcode_id"]] = (
+                    self.database.question_completions.load_all_title_slugs_by_user(
                         user["leetcode_id"])
-                    completions_map[user["leetcode_id"]] = completions
-                for question in questions:
-                    completions = 0
-                    for user in users:
-                        completed = question["title_slug"] in completions_map[user["leetcode_id"]]
-                        if completed:
-                            user_scores[user["leetcode_id"]] += question["difficulty"]
-                            completions += 1
-                    total_completions += completions
-                    result += f"{question['title']}\n" \
-                        f"\t*{completions}/{len(users)} users completed*\n\n"
-                group_percentage = int(
-                    ((total_completions / (len(users) * len(questions)))) * 100
                 )
-                result += f"**Group completion:** {group_percentage}%"
-        if challenge:
-            result += "\n\n"
-            max_name_width = max(list(len(u["leetcode_id"]) for u in users))
+        for question in questions:
+            completions = 0
             for user in users:
-                if user_scores[user["leetcode_id"]]:
-                    stars = Emojis.star * user_scores[user["leetcode_id"]]
-                    # NOTICE: In the future all database methods should return a well-defined
-                    #         object. That avoids having to do things like the following and
-                    #         allows for direct access via dot-operator
-                    LEETCODE_STR = "leetcode_id"
-                    result += f"`  {user[LEETCODE_STR].rjust(max_name_width)}` {stars}\n"
+                completed = question["title_slug"] in completions_map[user["leetcode_id"]]
+                if completed:
+                    user_scores[user["leetcode_id"]] += question["difficulty"]
+                    completions += 1
+            total_completions += completions
+            result += f"{question['title']}\n" \
+                f"\t*{completions}/{len(users)} users completed*\n\n"
+        group_percentage = int(
+            ((total_completions / (len(users) * len(questions)))) * 100
+        )
+        result += f"**Group completion:** {group_percentage}%"
+        result += "\n\n"
+        max_name_width = max(list(len(u["leetcode_id"]) for u in users))
+        for user in users:
+            if user_scores[user["leetcode_id"]]:
+                stars = Emojis.star * user_scores[user["leetcode_id"]]
+                # NOTICE: In the future all database methods should return a well-defined
+                #         object. That avoids having to do things like the following and
+                #         allows for direct access via dot-operator
+                LEETCODE_STR = "leetcode_id"
+                result += f"`  {user[LEETCODE_STR].rjust(max_name_width)}` {stars}\n"
         return result
 
+    @holds_database_lock
     def new_challenge(self) -> str:
         """
         Generates a new Weekly Challenge
         """
-        questions = self.database.leetcode_questions.loadall()
-        previous_questions = self.database.weekly_questions.loadall()
-        previous_question_slugs = [q["title_slug"] for q in previous_questions]
-        valid_questions = list(
-            filter(lambda q: q["title_slug"]
-                   not in previous_question_slugs, questions)
-        )
-        random.shuffle(valid_questions)
-        weekly_questions = []
-        current_difficulty = 0
-        for question in valid_questions:
-            if question["difficulty"] + current_difficulty <= 5:
-                weekly_questions.append(question)
-                current_difficulty += question["difficulty"]
-                if current_difficulty >= 5:
-                    break
+        weekly_questions = self.database.question_pool.pick(total_difficulty=5)
         # Insert new questions into datbase
-        return self.database.create_new_weekly_challenge(weekly_questions)
+        message = self.database.create_new_weekly_challenge(weekly_questions)
+        self.database.flush()
+        return message
 
+    @holds_database_lock
     def user(self, discord_id: str) -> str:
         """
         Gets the leetcode_id of the requested user
@@ -251,6 +373,16 @@ Supported commands:
             return_message = user["leetcode_id"]
         return return_message
 
+    def metrics(self, extra: Optional[Dict[str, int]] = None) -> str:
+        """
+        Summarizes performance counters of the bot, such as Leetcode connection reuse,
+        followed by the `extra` counters of the caller
+        """
+        result = ""
+        for name, value in {**self.leetcode.metrics(), **(extra or {})}.items():
+            result += f"{name}: {value}\n"
+        return result
+
     def run(self) -> None:
         """
         Awaits for commands and processes them as received
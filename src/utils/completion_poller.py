@@ -0,0 +1,101 @@
+"""
+Completion Poller module
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .commands.command_util import CommandUtil
+
+class CompletionPoller:
+    """
+    Refreshes the question completions of all registered users for the current
+    weekly challenge in the background, so `!status` and `!group-status` can
+    render from the database.
+
+    Each round the users are split into batches of the Leetcode batch size, and
+    the batches are refreshed evenly spread over `interval` seconds instead of
+    all at once. The time each user was last refreshed is kept in memory, and
+    forgotten once it is older than two intervals, so commands refresh on demand
+    again if polling falls behind.
+    """
+
+    def __init__(self, command_util: CommandUtil, interval: float = 600.0):
+        self.command_util = command_util
+        self.interval = interval
+        # leetcode_id -> (challenge id, time of the last refresh)
+        self.refreshed_at: Dict[str, Tuple[int, float]] = {}
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+
+    def start(self) -> None:
+        """
+        Starts polling on a daemon thread
+        """
+        threading.Thread(target=self._poll_periodically, name="completion-poller",
+                         daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stops polling once the running refresh finishes
+        """
+        self.closed.set()
+
+    def mark_refreshed(self, leetcode_ids: List[str], challenge_id: int) -> None:
+        """
+        Records that the completions of users were fetched from Leetcode for a challenge
+        """
+        now = time.time()
+        with self.lock:
+            for leetcode_id in leetcode_ids:
+                self.refreshed_at[leetcode_id] = (challenge_id, now)
+
+    def last_refreshed(self, leetcode_ids: List[str], challenge_id: int) -> Optional[float]:
+        """
+        Determines when the completions of all the users were last refreshed for a
+        challenge, i.e. the oldest of their refresh times, or None if any of them
+        wasn't refreshed for it in the last two intervals
+        """
+        oldest_allowed = time.time() - 2 * self.interval
+        with self.lock:
+            times = [self.refreshed_at.get(leetcode_id) for leetcode_id in leetcode_ids]
+        if not times or any(
+            entry is None or entry[0] != challenge_id or entry[1] < oldest_allowed
+            for entry in times
+        ):
+            return None
+        return min(entry[1] for entry in times)
+
+    def poll(self) -> None:
+        """
+        Refreshes every registered user once, spread over the polling interval
+        """
+        database = self.command_util.database
+        with database.lock:
+            challenge = database.weekly_challenges.get_latest()
+            users = database.users.loadall()
+        if not challenge or not users:
+            self.closed.wait(self.interval)
+            return
+        leetcode_ids = [user["leetcode_id"] for user in users]
+        batch_size = max(self.command_util.leetcode.batch_size, 1)
+        batches = [
+            leetcode_ids[start:start + batch_size]
+            for start in range(0, len(leetcode_ids), batch_size)
+        ]
+        pause = self.interval / len(batches)
+        for batch in batches:
+            started = time.monotonic()
+            self.command_util.refresh_completions(batch, challenge["id"])
+            if self.closed.wait(max(pause - (time.monotonic() - started), 0)):
+                return
+
+    def _poll_periodically(self) -> None:
+        while not self.closed.is_set():
+            try:
+                self.poll()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # Keep polling, the next round may well succeed
+                print(f"Completion poll failed: {error!r}")
+                self.closed.wait(self.interval)
@@ -0,0 +1,30 @@
+"""
+Atomic file writing module
+"""
+
+import os
+
+
+def atomic_write(path: str, text: str) -> None:
+    """
+    Replaces the contents of `path` with `text` so that a crash leaves either
+    the old or the new file on disk, never a truncated one.
+
+    The text is written to a temporary file next to `path`, synced to disk and
+    then renamed over `path`. The directory is synced afterwards so the rename
+    itself is durable.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        handle.write(text)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    # Directories can't be opened for syncing on every platform (e.g. Windows)
+    if hasattr(os, "O_DIRECTORY"):
+        directory_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
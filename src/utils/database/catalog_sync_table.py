@@ -0,0 +1,47 @@
+"""
+Catalog Sync table module
+"""
+
+from typing import Optional
+from tinydb import TinyDB
+from tinydb.table import Document
+from .db_decorators import validate_insert
+from .table_index import UniqueIndex
+
+class CatalogSyncTable():
+    """
+    Table to hold the validators of the last Leetcode catalog download per URL:
+    the `etag` and `last_modified` response headers and a hash of the content
+    """
+    TABLE_FIELDS = ["url", "etag", "last_modified", "content_hash"]
+    TABLE_NAME = "Catalog_Sync"
+
+    def __init__(self, database: TinyDB):
+        self.table = database.table(self.TABLE_NAME)
+        self.url_index = UniqueIndex("url")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory index from the Catalog_Sync database table
+        """
+        self.url_index.rebuild(self.table.all())
+
+    def load(self, url: str) -> Optional[dict]:
+        """
+        Loads the validators stored for a URL
+        """
+        return self.url_index.get(url)
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def save(self, item: dict) -> bool:
+        """
+        Inserts or replaces the validators of a URL in the Catalog_Sync database table
+        """
+        existing = self.url_index.get(item["url"])
+        if existing is None:
+            self.url_index.add(Document(item, self.table.insert(item)))
+        else:
+            self.table.update(item, doc_ids=[existing.doc_id])
+            existing.update(item)
+        return True
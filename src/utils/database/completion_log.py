@@ -0,0 +1,108 @@
+"""
+Completion Log module
+"""
+
+import json
+import os
+from typing import Iterable, List
+
+from .atomic_file import atomic_write
+
+
+class CompletionLog:
+    """
+    Append-only storage for the rows of the Question Completions table.
+
+    New rows are appended to `<path>.log` as one JSON document per line, so
+    storing a completion costs the same no matter how many are on disk. Every
+    `compact_every` appended rows, the full set of rows is written to
+    `<path>.snapshot.json` and the log is emptied. On startup the rows are
+    rebuilt from the snapshot followed by the log.
+
+    Replaying the log is idempotent for the table, which dedupes rows by key,
+    so a crash between writing a snapshot and emptying the log is harmless.
+    """
+
+    def __init__(self, path: str, compact_every: int = 1000):
+        self.log_path = f"{path}.log"
+        self.snapshot_path = f"{path}.snapshot.json"
+        self.compact_every = compact_every
+        self.appended = 0
+        self.handle = None
+
+    def exists(self) -> bool:
+        """
+        Checks whether a snapshot or log has been written before
+        """
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.log_path)
+
+    def load(self) -> List[dict]:
+        """
+        Loads all rows from the snapshot and the log
+        """
+        rows = []
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as handle:
+                rows = json.load(handle)
+        self.appended = 0
+        if os.path.exists(self.log_path):
+            self._drop_partial_line()
+            with open(self.log_path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    rows.append(json.loads(line))
+                    self.appended += 1
+        return rows
+
+    def append_many(self, rows: Iterable[dict]) -> None:
+        """
+        Appends rows to the end of the log
+        """
+        if self.handle is None:
+            # pylint: disable-next=consider-using-with
+            self.handle = open(self.log_path, "a", encoding="utf-8")
+        for row in rows:
+            self.handle.write(json.dumps(row) + "\n")
+            self.appended += 1
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    def needs_compaction(self) -> bool:
+        """
+        Checks whether enough rows have been appended to compact the log
+        """
+        return self.appended >= self.compact_every
+
+    def compact(self, rows: Iterable[dict]) -> None:
+        """
+        Writes all rows to a new snapshot and empties the log
+        """
+        atomic_write(self.snapshot_path, json.dumps(list(rows)))
+        self.close()
+        with open(self.log_path, "w", encoding="utf-8") as handle:
+            os.fsync(handle.fileno())
+        self.appended = 0
+
+    def remove(self) -> None:
+        """
+        Deletes the snapshot and the log
+        """
+        self.close()
+        for path in (self.log_path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self) -> None:
+        """
+        Closes the log file
+        """
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+
+    def _drop_partial_line(self) -> None:
+        # A crash in the middle of an append can leave half a line at the end of
+        # the log. Cut it off so the next append starts on a fresh line.
+        with open(self.log_path, "rb+") as handle:
+            content = handle.read()
+            if content and not content.endswith(b"\n"):
+                handle.truncate(content.rfind(b"\n") + 1)
@@ -1,70 +1,291 @@
 """
     Datebase Utility module
 """
+import atexit
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List
-from tinydb import TinyDB, where
+from typing import Callable, Iterator, List
+from tinydb import TinyDB
+from tinydb.storages import JSONStorage
 
 from .users_table import UsersTable
 from .weeklyquestion_table import WeeklyQuestionTable
 from .leetcode_question_table import LeetcodeQuestionsTable
 from .weekly_challenge_table import WeeklyChallengeTable
 from .question_completions_table import QuestionCompletionsTable
+from .submission_watermark_table import SubmissionWatermarkTable
+from .catalog_sync_table import CatalogSyncTable
+from .completion_log import CompletionLog
+from .question_pool import QuestionPool
+from .db_decorators import is_valid_item
+from .write_behind_storage import WriteBehindStorage
+from .transaction_middleware import TransactionMiddleware
+from .sqlite.sqlite_database import SqliteDatabase
+from .sqlite.users_table import SqliteUsersTable
+from .sqlite.weeklyquestion_table import SqliteWeeklyQuestionTable
+from .sqlite.leetcode_question_table import SqliteLeetcodeQuestionsTable
+from .sqlite.weekly_challenge_table import SqliteWeeklyChallengeTable
+from .sqlite.question_completions_table import SqliteQuestionCompletionsTable
+from .sqlite.submission_watermark_table import SqliteSubmissionWatermarkTable
+from .sqlite.catalog_sync_table import SqliteCatalogSyncTable
+
+BACKENDS = ["tinydb", "sqlite"]
 
 # Database Utility Class Definition
+# pylint: disable-next=too-many-instance-attributes
 class DatabaseUtil:
     """
     A class for managing all database interactions, with member classes for each table.
     """
 
-    def __init__(self, database_path: str):
+    def __init__(
+        self,
+        database_path: str,
+        backend: str = "tinydb",
+        write_behind: bool = False,
+        completions_log: bool = False,
+        **storage_options,
+    ):
+        """
+        Opens the database at `database_path` with the given backend.
+
+        The `tinydb` backend stores everything in a single JSON file. With
+        `write_behind` that file is kept in memory and written back to disk in
+        batches (see `WriteBehindStorage`); `storage_options` are passed on to
+        the storage, e.g. `flush_interval` and `flush_writes`. With
+        `completions_log` the Question Completions rows are kept in an
+        append-only log next to the database instead (see `CompletionLog`),
+        compacted every `compact_every` rows.
+
+        The `sqlite` backend stores everything in a SQLite database file with
+        indexes on every lookup key (see `SqliteDatabase`).
+        """
         self.database_path = database_path
-        self.db = TinyDB(self.database_path)
+        # Serializes database access of threads, e.g. Discord commands run on a
+        # worker pool: TinyDB and the in-memory indexes aren't thread safe
+        self.lock = threading.RLock()
+        self.challenge_listeners: List[Callable[[str, int, List[dict]], None]] = []
+        self.catalog_listeners: List[Callable[[], None]] = []
+        self._open_tables(backend, write_behind, completions_log, storage_options)
+        self.question_pool = QuestionPool(self.leetcode_questions, self.weekly_questions)
+        self.add_challenge_listener(self.question_pool.on_challenge_change)
+        self.add_catalog_listener(self.question_pool.invalidate)
+
+    def _open_tables(self, backend, write_behind, completions_log, storage_options) -> None:
+        if backend == "sqlite":
+            self.db = SqliteDatabase(self.database_path)
+            atexit.register(self.db.close)
+            self.users = SqliteUsersTable(self.db)
+            self.weekly_questions = SqliteWeeklyQuestionTable(self.db)
+            self.leetcode_questions = SqliteLeetcodeQuestionsTable(self.db)
+            self.weekly_challenges = SqliteWeeklyChallengeTable(self.db)
+            self.question_completions = SqliteQuestionCompletionsTable(self.db)
+            self.submission_watermarks = SqliteSubmissionWatermarkTable(self.db)
+            self.catalog_sync = SqliteCatalogSyncTable(self.db)
+            return
+
+        if backend != "tinydb":
+            raise ValueError(
+                f"Unknown database backend `{backend}`, expected one of {', '.join(BACKENDS)}"
+            )
+        log = None
+        # Only meant for the completions log, the storage doesn't accept it
+        compact_every = storage_options.pop("compact_every", 1000)
+        if completions_log:
+            log = CompletionLog(self.database_path, compact_every)
+            atexit.register(log.close)
+        if write_behind:
+            self.db = TinyDB(
+                self.database_path,
+                storage=TransactionMiddleware(WriteBehindStorage),
+                **storage_options,
+            )
+            # Write back anything still pending when the app shuts down
+            atexit.register(self.db.close)
+        else:
+            self.db = TinyDB(self.database_path, storage=TransactionMiddleware(JSONStorage))
         self.users = UsersTable(self.db)
         self.weekly_questions = WeeklyQuestionTable(self.db)
         self.leetcode_questions = LeetcodeQuestionsTable(self.db)
         self.weekly_challenges = WeeklyChallengeTable(self.db)
-        self.question_completions = QuestionCompletionsTable(self.db)
+        self.question_completions = QuestionCompletionsTable(self.db, log)
+        self.submission_watermarks = SubmissionWatermarkTable(self.db)
+        self.catalog_sync = CatalogSyncTable(self.db)
+        if not completions_log:
+            self._fold_completions_log()
+
+    def _fold_completions_log(self) -> None:
+        # The completions log was turned off: move the completions recorded in it
+        # back into the database, then delete it so they aren't moved twice
+        log = CompletionLog(self.database_path)
+        if not log.exists():
+            return
+        missing = {}
+        for row in log.load():
+            if not self.question_completions.completion_index.contains(row):
+                missing.setdefault((row["leetcode_id"], row["title_slug"]), row)
+        if missing:
+            self.question_completions.table.insert_multiple(list(missing.values()))
+            self.question_completions.reload()
+        log.remove()
 
+    def flush(self) -> None:
+        """
+        Forces pending writes to disk. Does nothing for the plain `tinydb`
+        backend, since every write is on disk already.
+        """
+        if isinstance(self.db, SqliteDatabase):
+            self.db.flush()
+            return
+        flush = getattr(self.db.storage, "flush", None)
+        if flush:
+            flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Runs the database writes of a `with` block as one transaction: they are
+        all committed in a single write when the block exits, or none of them
+        are if the block raises. Other threads can't access the database meanwhile.
+        """
+        with self.lock:
+            if isinstance(self.db, SqliteDatabase):
+                with self.db.transaction():
+                    yield
+                return
+            try:
+                with self.db.storage.transaction():
+                    yield
+            except BaseException:
+                # The in-memory indexes and query caches may hold rolled back rows
+                for table in (
+                    self.users,
+                    self.weekly_questions,
+                    self.leetcode_questions,
+                    self.weekly_challenges,
+                    self.question_completions,
+                    self.submission_watermarks,
+                    self.catalog_sync,
+                ):
+                    table.table.clear_cache()
+                    table.reload()
+                raise
 
+    def ingest_submissions(self, leetcode_id: str, submissions: List[dict]) -> int:
+        """
+        Records a user's accepted submissions as question completions.
+
+        Only submissions newer than the user's watermark in the Submission_Watermark
+        table are looked at, and the watermark is then raised to the newest one, so
+        each submission is ingested once however often it is fetched. Returns the
+        number of new completions.
+
+        The completions and the watermark are written in one transaction, except
+        with the completions log: rows appended to the log can't be rolled back.
+        They are appended before the watermark is raised, so a crash or rollback
+        in between only leaves completions whose submissions are fetched again
+        and skipped as duplicates, never a watermark past unrecorded completions.
+        """
+        with self.lock:
+            watermark = self.submission_watermarks.load(leetcode_id)
+            new_submissions = [
+                submission for submission in submissions if submission["timestamp"] > watermark
+            ]
+            if len(new_submissions) == 0:
+                return 0
+            with self.transaction():
+                inserted = self.question_completions.insert_many(leetcode_id, new_submissions)
+                self.submission_watermarks.advance(
+                    leetcode_id, max(submission["timestamp"] for submission in new_submissions)
+                )
+            return inserted
+
+    def add_challenge_listener(self, listener: Callable[[str, int, List[dict]], None]) -> None:
+        """
+        Registers a function called whenever a weekly challenge is created or deleted.
+
+        The listener is called with the event (`"created"` or `"deleted"`), the
+        challenge id and the weekly questions of the challenge.
+        """
+        self.challenge_listeners.append(listener)
+
+    def add_catalog_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Registers a function called whenever questions of the Leetcode_Question
+        table were added, changed or removed
+        """
+        self.catalog_listeners.append(listener)
+
+    def notify_catalog_change(self) -> None:
+        """
+        Calls the catalog listeners, once the Leetcode_Question table changed
+        """
+        for listener in self.catalog_listeners:
+            listener()
+
+    def _notify_challenge_listeners(self, event: str, challenge_id: int, questions: List[dict]):
+        for listener in self.challenge_listeners:
+            listener(event, challenge_id, questions)
 
     def create_new_weekly_challenge(self, question_list: List[dict]) -> str:
         """
-        Creates a new weekly challenge and weekly questions
+        Creates a new weekly challenge and weekly questions.
+
+        Every question is validated before anything is written. The challenge and
+        all of its questions are then stored in one transaction, so a failure
+        never leaves a partially created challenge behind. Other threads can't
+        access the database in between.
         """
-        message = ""
-        success = True
-        last_chal = self.weekly_challenges.get_latest()
-        if last_chal:
-            new_chal_id = last_chal["id"] + 1
-        else:
-            new_chal_id = 1
-        timestamp = datetime.timestamp(datetime.now())
-        challenge = {"id": new_chal_id, "date": timestamp}
-        chal_success = self.weekly_challenges.insert(challenge)
-        if chal_success:
-            for question in question_list:
-                weekly_question = {**question, "challenge_id": new_chal_id}
-                question_success = self.weekly_questions.insert(weekly_question)
-                if not question_success:
-                    message += (
-                        f"Error creating weekly question `{question['title_slug']}`\n"
-                    )
-                    success = False
-        else:
-            message += "Error creating weekly challenge"
-            success = False
-        if success:
-            message = "Challenge created successfully!"
-        return message
+        # Nothing may change between validating and writing the challenge
+        with self.lock:
+            last_chal = self.weekly_challenges.get_latest()
+            if last_chal:
+                new_chal_id = last_chal["id"] + 1
+            else:
+                new_chal_id = 1
+            timestamp = datetime.timestamp(datetime.now())
+            challenge = {"id": new_chal_id, "date": timestamp}
+            weekly_questions = [
+                {**question, "challenge_id": new_chal_id} for question in question_list
+            ]
+
+            message = ""
+            title_slugs = set()
+            for question in weekly_questions:
+                if (
+                    not is_valid_item(question, self.weekly_questions.TABLE_FIELDS)
+                    or question["title_slug"] in title_slugs
+                    or self.weekly_questions.load_by_title_slug(question["title_slug"])
+                ):
+                    message += f"Error creating weekly question `{question.get('title_slug')}`\n"
+                else:
+                    title_slugs.add(question["title_slug"])
+            if message:
+                return message
+
+            try:
+                with self.transaction():
+                    if not self.weekly_challenges.insert(challenge):
+                        raise RuntimeError(f"Challenge {new_chal_id} already exists")
+                    if self.weekly_questions.insert_many(weekly_questions) != len(weekly_questions):
+                        raise RuntimeError(f"Weekly questions of challenge {new_chal_id} changed")
+            except RuntimeError:
+                return "Error creating weekly challenge"
+            self._notify_challenge_listeners("created", new_chal_id, weekly_questions)
+            return "Challenge created successfully!"
 
     def delete_weekly_challenge(self, challenge_id: int) -> bool:
         """
         Deletes an item in the Weekly_Challenge database table and
         calls weeklyquestion_delete_by_challenge_id() to delete associated questions from
-        Weekly_Question database table
+        Weekly_Question database table, in one transaction
         """
-
-        self.weekly_questions.delete_by_challenge_id(challenge_id)
-        results = self.weekly_challenges.table.remove(where("id") == challenge_id)
-        return len(results) > 0
+        with self.lock:
+            questions = self.weekly_questions.load_by_challenge_id(challenge_id)
+            with self.transaction():
+                self.weekly_questions.delete_by_challenge_id(challenge_id)
+                deleted = self.weekly_challenges.delete(challenge_id)
+            if deleted:
+                self._notify_challenge_listeners("deleted", challenge_id, questions)
+            return deleted
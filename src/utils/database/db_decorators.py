@@ -2,8 +2,19 @@
 Function Decorator for database table modules to validate inserts
 """
 
+def is_valid_item(item, required_fields, optional_fields=()) -> bool:
+    """
+    Checks that an item is a dict holding all the required fields, and no
+    fields besides those and the optional fields
+    """
+    return (
+        isinstance(item, dict)
+        and all(field in item.keys() for field in required_fields)
+        and all(field in required_fields or field in optional_fields for field in item.keys())
+    )
+
 # Decorator for validating database insert methods
-def validate_insert(required_fields):
+def validate_insert(required_fields, optional_fields=()):
     """
     Python decorator function to validate objects before they are inserted
     into the database.
@@ -16,7 +27,7 @@ def validate_insert(required_fields):
 
         In the above, `TABLE_XXXX_FIELDS` should be the class constant variable
         containing a list of the required fields for the table to be inserted
-        into.
+        into. Fields an item may leave out are listed in `optional_fields`.
 
     Note:
         This method does not prevent inserting duplicate values for unique
@@ -26,11 +37,7 @@ def validate_insert(required_fields):
 
     def decorator(func):
         def wrapper(self, *args):
-            if (
-                isinstance(args[0], dict)
-                and all(field in args[0].keys() for field in required_fields)
-                and len(args[0].keys()) == len(required_fields)
-            ):
+            if is_valid_item(args[0], required_fields, optional_fields):
                 return func(self, *args)
             return False  # Indicates validation failure
 
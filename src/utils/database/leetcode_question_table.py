@@ -2,10 +2,11 @@
 Leetcode Question table module
 """
 
-from typing import List
-from tinydb import TinyDB, where
+from typing import Dict, Iterable, List
+from tinydb import TinyDB
 from tinydb.table import Document
-from .db_decorators import validate_insert
+from .db_decorators import is_valid_item, validate_insert
+from .table_index import UniqueIndex
 
 class LeetcodeQuestionsTable():
     """
@@ -16,17 +17,99 @@ class LeetcodeQuestionsTable():
 
     def __init__(self, database: TinyDB):
         self.table = database.table(self.TABLE_NAME)
+        self.id_index = UniqueIndex("id")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory index from the Leetcode_Question database table
+        """
+        self.id_index.rebuild(self.table.all())
 
     def insert_many(self, items: List[dict]) -> int:
         """
         Inserts a collection of items into the Leetcode_Question database
-        table
+        table. Items with an existing ID are skipped and all new items are
+        stored in a single write.
         """
-        inserts = 0
+        new_questions = {}
         for item in items:
-            if self.insert(item):
-                inserts += 1
-        return inserts
+            if is_valid_item(item, self.TABLE_FIELDS) and not self.id_index.contains(item):
+                new_questions.setdefault(item["id"], item)
+        self._insert_multiple(list(new_questions.values()))
+        return len(new_questions)
+
+    def snapshot(self) -> Dict[int, dict]:
+        """
+        Copies the questions of the Leetcode_Question database table by id, for
+        `diff` to compare against without holding the database lock
+        """
+        return {question["id"]: dict(question) for question in self.id_index.rows.values()}
+
+    def diff(self, items: Iterable[dict], existing: Dict[int, dict]) -> dict:
+        """
+        Compares a full copy of the Leetcode catalog with a `snapshot` of the
+        Leetcode_Question database table. Invalid items are skipped.
+
+        Returns a change set of the `new` and `changed` items, the `removed`
+        questions that are missing from `items`, and the number of `unchanged` items.
+        """
+        new_questions = {}
+        changed_questions = {}
+        unchanged = set()
+        for item in items:
+            if not is_valid_item(item, self.TABLE_FIELDS):
+                continue
+            if item["id"] not in existing:
+                new_questions[item["id"]] = item
+            elif any(existing[item["id"]][field] != item[field] for field in self.TABLE_FIELDS):
+                changed_questions[item["id"]] = item
+            else:
+                unchanged.add(item["id"])
+        return {
+            "new": list(new_questions.values()),
+            "changed": list(changed_questions.values()),
+            "removed": [
+                question for question in existing.values()
+                if question["id"] not in unchanged and question["id"] not in changed_questions
+            ],
+            "unchanged": len(unchanged),
+        }
+
+    def apply_changes(self, changes: dict) -> None:
+        """
+        Writes a change set made by `diff` to the Leetcode_Question database
+        table in a single write: the new, changed and removed questions are
+        stored together or, if any of them fails, not at all
+        """
+        # The table may have changed since the snapshot `diff` compared against
+        new_questions = [item for item in changes["new"] if not self.id_index.contains(item)]
+        changed_questions = {
+            item["id"]: item for item in changes["changed"] if self.id_index.get(item["id"])
+        }
+        removed = [self.id_index.get(question["id"]) for question in changes["removed"]]
+        removed = [question for question in removed if question is not None]
+        try:
+            with self.table.storage.transaction():
+                doc_ids = self.table.insert_multiple(new_questions) if new_questions else []
+                if changed_questions:
+                    self.table.update(
+                        lambda question: question.update(changed_questions[question["id"]]),
+                        doc_ids=[self.id_index.get(q_id).doc_id for q_id in changed_questions],
+                    )
+                if removed:
+                    self.table.remove(doc_ids=[question.doc_id for question in removed])
+        except BaseException:
+            # The query cache may hold rolled back rows
+            self.table.clear_cache()
+            raise
+        # Only mirror the change set in the index once it is written
+        for item, doc_id in zip(new_questions, doc_ids):
+            self.id_index.add(Document(item, doc_id))
+        for question_id, item in changed_questions.items():
+            self.id_index.get(question_id).update(item)
+        for question in removed:
+            self.id_index.remove(question)
 
     @validate_insert(required_fields=TABLE_FIELDS)
     def insert(self, item: dict) -> bool:
@@ -34,19 +117,17 @@ class LeetcodeQuestionsTable():
         Inserts an item into the Leetcode_Question database table
         """
         # Prevent duplicate ID's
-        if len(self.table.search(where("id") == item["id"])) == 0:
-            self.table.insert(item)
-            return True
-        return False
+        if self.id_index.contains(item):
+            return False
+        doc_id = self.table.insert(item)
+        self.id_index.add(Document(item, doc_id))
+        return True
 
     def load(self, question_id):
         """
         Loads a single item by question_id in the Leetcode_Question database table
         """
-        questions = self.table.search(where("id") == question_id)
-        if len(questions) == 0:
-            return None
-        return questions[0]
+        return self.id_index.get(question_id)
 
     def loadall(self) -> List[Document]:
         """
@@ -58,4 +139,15 @@ class LeetcodeQuestionsTable():
         """
         Deletes an item in the Leetcode_Question database table
         """
-        return self.table.remove(where("id") == question_id)
+        question = self.id_index.get(question_id)
+        if question is None:
+            return []
+        self.id_index.remove(question)
+        return self.table.remove(doc_ids=[question.doc_id])
+
+    def _insert_multiple(self, items: List[dict]) -> None:
+        if len(items) == 0:
+            return
+        doc_ids = self.table.insert_multiple(items)
+        for item, doc_id in zip(items, doc_ids):
+            self.id_index.add(Document(item, doc_id))
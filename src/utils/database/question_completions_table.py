@@ -3,65 +3,91 @@ Question Completions module
 """
 
 from typing import List
-from tinydb import TinyDB, where
+from tinydb import TinyDB
+from tinydb.table import Document
+from .completion_log import CompletionLog
 from .db_decorators import validate_insert
+from .table_index import GroupIndex, UniqueIndex
 
 class QuestionCompletionsTable():
     """
-    Table to store all completed questions by leetcode user ID & title slug
+    Table to store all completed questions by leetcode user ID & title slug, with
+    the time the question was solved
+
+    Rows are stored in the TinyDB database by default. When a `CompletionLog` is
+    given, rows are appended to the log instead so new completions don't rewrite
+    the whole database file.
     """
     TABLE_FIELDS = ["leetcode_id", "title_slug"]
+    # Completions recorded before they kept the time they were solved have none
+    OPTIONAL_FIELDS = ["timestamp"]
     TABLE_NAME = "Question_Completions"
 
-    def __init__(self, database: TinyDB):
+    def __init__(self, database: TinyDB, log: CompletionLog = None):
         self.table = database.table(self.TABLE_NAME)
+        self.log = log
+        self.completion_index = UniqueIndex("leetcode_id", "title_slug")
+        self.user_index = GroupIndex("leetcode_id")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory indexes from the Question Completions database table
+        """
+        if self.log is None:
+            completions = self.table.all()
+        elif self.log.exists():
+            completions = self.log.load()
+        else:
+            # First start with a log: carry over rows stored in the database so far
+            completions = [dict(completion) for completion in self.table.all()]
+            self.log.compact(completions)
+        self.completion_index.rebuild(completions)
+        self.user_index.rebuild(self.completion_index.rows.values())
 
-    @validate_insert(required_fields=TABLE_FIELDS)
+    @validate_insert(required_fields=TABLE_FIELDS, optional_fields=OPTIONAL_FIELDS)
     def insert(self, item: dict) -> bool:
         """
-        Inserts a single item of leetcode_id and title_slug to QuestionCompletions database table
+        Inserts a single item of leetcode_id, title_slug and optionally timestamp to
+        QuestionCompletions database table
         """
-        matches = self.table.search(
-            (where("leetcode_id") == item["leetcode_id"])
-            & (where("title_slug") == item["title_slug"])
-        )
-        if len(matches) == 0:
-            self.table.insert(item)
-            return True
-        return False
+        if self.completion_index.contains(item):
+            return False
+        self._store([{**item, "timestamp": item.get("timestamp")}])
+        return True
 
     def insert_many(self, leetcode_id: str, items: List[dict]) -> int:
         """
-        Inserts a collection of items into the Question Completions database table
+        Inserts a collection of items into the Question Completions database table.
+        Items already recorded for the user are skipped and all new items are
+        stored in a single write.
         """
-        inserts = 0
+        new_completions = {}
         for item in items:
-            completion_insert = {"leetcode_id": leetcode_id, "title_slug": item["title_slug"]}
-            if self.insert(completion_insert):
-                inserts += 1
-        return inserts
+            completion_insert = {
+                "leetcode_id": leetcode_id,
+                "title_slug": item["title_slug"],
+                "timestamp": item.get("timestamp"),
+            }
+            if not self.completion_index.contains(completion_insert):
+                # Keyed by title slug so duplicates within `items` are only stored once
+                new_completions.setdefault(item["title_slug"], completion_insert)
+        if len(new_completions) == 0:
+            return 0
+        self._store(list(new_completions.values()))
+        return len(new_completions)
 
     def load(self, leetcode_id: str, title_slug: str):
         """
         Load a single item by leetcode_id and title_slug in the Question Completions database table
         """
-        completion = self.table.search(
-            where("leetcode_id") == leetcode_id
-            and where("title_slug") == title_slug
-        )
-        if len(completion) == 0:
-            return None
-        return completion[0]
+        return self.completion_index.get(leetcode_id, title_slug)
 
     def load_all_title_slugs_by_user(self, leetcode_id):
         """
         Loads a list of all title slugs in the Question Completions database table
         """
-        results = self.table.search(where("leetcode_id") == leetcode_id)
-        title_slugs = []
-        for item in results:
-            title_slugs.append(item["title_slug"])
-        return title_slugs
+        return [item["title_slug"] for item in self.user_index.get(leetcode_id)]
 
     def check_completion(self, leetcode_id: str, title_slug: str) -> bool:
         """
@@ -71,3 +97,15 @@ class QuestionCompletionsTable():
         if completed:
             return True
         return False
+
+    def _store(self, completions: List[dict]) -> None:
+        if self.log is None:
+            doc_ids = self.table.insert_multiple(completions)
+            completions = [Document(item, doc_id) for item, doc_id in zip(completions, doc_ids)]
+        else:
+            self.log.append_many(completions)
+        for completion in completions:
+            self.completion_index.add(completion)
+            self.user_index.add(completion)
+        if self.log is not None and self.log.needs_compaction():
+            self.log.compact(self.completion_index.rows.values())
@@ -0,0 +1,137 @@
+"""
+Question Pool module
+"""
+
+import random
+from typing import Dict, List, Optional, Tuple
+
+
+class QuestionPool:
+    """
+    Catalog questions that have not been used in a weekly challenge yet,
+    bucketed by difficulty.
+
+    The pool is built from the Leetcode_Question and Weekly_Question tables the
+    first time it is used and is then kept up to date through the challenge
+    listener of `DatabaseUtil`. Adding, removing and drawing a question are all
+    O(1): every bucket is a list and the position of each question in its bucket
+    is tracked, so a question is removed by swapping it with the last one.
+    """
+
+    def __init__(self, leetcode_questions, weekly_questions, seed: Optional[int] = None):
+        self.leetcode_questions = leetcode_questions
+        self.weekly_questions = weekly_questions
+        self.random = random.Random(seed)
+        self.buckets: Optional[Dict[int, List[dict]]] = None
+        # title_slug -> (difficulty, index of the question in its bucket)
+        self.positions: Dict[str, Tuple[int, int]] = {}
+
+    def reseed(self, seed: Optional[int]) -> None:
+        """
+        Resets the random number generator so picks are reproducible
+        """
+        self.random.seed(seed)
+
+    def invalidate(self) -> None:
+        """
+        Drops the pool so it is rebuilt from the database on next use, e.g. after
+        the catalog was updated
+        """
+        self.buckets = None
+        self.positions = {}
+
+    def add(self, question: dict) -> None:
+        """
+        Adds a question to the pool of its difficulty
+        """
+        self._build()
+        self._add(question)
+
+    def discard(self, title_slug: str) -> None:
+        """
+        Removes a question from the pool if it is present
+        """
+        self._build()
+        self._remove(title_slug)
+
+    def size(self, difficulty: int) -> int:
+        """
+        Counts the unused questions of a difficulty
+        """
+        self._build()
+        return len(self.buckets.get(difficulty, []))
+
+    def pick(self, total_difficulty: int = 5) -> List[dict]:
+        """
+        Randomly picks unused questions whose difficulties add up to `total_difficulty`.
+
+        Each draw is uniform over all unused questions that still fit the remaining
+        difficulty, which is the same selection the former shuffle-and-scan made.
+        Fewer questions are returned if the pool runs out. The pool itself is left
+        unchanged; questions are only removed once their challenge is created.
+        """
+        self._build()
+        picked = []
+        remaining = total_difficulty
+        while remaining > 0:
+            candidates = [
+                (difficulty, bucket)
+                for difficulty, bucket in self.buckets.items()
+                if 0 < difficulty <= remaining and bucket
+            ]
+            if not candidates:
+                break
+            draw = self.random.randrange(sum(len(bucket) for _, bucket in candidates))
+            for _, bucket in candidates:
+                if draw < len(bucket):
+                    question = bucket[draw]
+                    break
+                draw -= len(bucket)
+            # Take the question out until the pick is done so it can't be drawn twice
+            self._remove(question["title_slug"])
+            picked.append(question)
+            remaining -= question["difficulty"]
+        for question in picked:
+            self._add(question)
+        return picked
+
+    def on_challenge_change(self, event: str, _challenge_id: int, questions: List[dict]) -> None:
+        """
+        Challenge listener keeping the pool in sync with the Weekly_Question table
+        """
+        if self.buckets is None:
+            return
+        for question in questions:
+            if event == "created":
+                self._remove(question["title_slug"])
+            elif event == "deleted":
+                catalog_question = self.leetcode_questions.load(question["id"])
+                if catalog_question:
+                    self._add(catalog_question)
+
+    def _build(self) -> None:
+        if self.buckets is not None:
+            return
+        self.buckets = {}
+        self.positions = {}
+        used_slugs = {question["title_slug"] for question in self.weekly_questions.loadall()}
+        for question in self.leetcode_questions.loadall():
+            if question["title_slug"] not in used_slugs:
+                self._add(question)
+
+    def _add(self, question: dict) -> None:
+        if question["title_slug"] in self.positions:
+            return
+        bucket = self.buckets.setdefault(question["difficulty"], [])
+        self.positions[question["title_slug"]] = (question["difficulty"], len(bucket))
+        bucket.append(question)
+
+    def _remove(self, title_slug: str) -> None:
+        if title_slug not in self.positions:
+            return
+        difficulty, position = self.positions.pop(title_slug)
+        bucket = self.buckets[difficulty]
+        last = bucket.pop()
+        if position < len(bucket):
+            bucket[position] = last
+            self.positions[last["title_slug"]] = (difficulty, position)
@@ -0,0 +1,48 @@
+"""
+SQLite Catalog Sync table module
+"""
+
+from typing import Optional
+from ..db_decorators import validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteCatalogSyncTable():
+    """
+    Table to hold the validators of the last Leetcode catalog download per URL:
+    the `etag` and `last_modified` response headers and a hash of the content
+    """
+    TABLE_FIELDS = ["url", "etag", "last_modified", "content_hash"]
+    TABLE_NAME = "Catalog_Sync"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT
+        ) WITHOUT ROWID""",
+    ]
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    def load(self, url: str) -> Optional[dict]:
+        """
+        Loads the validators stored for a URL
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE url = ?", (url,)
+        )
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def save(self, item: dict) -> bool:
+        """
+        Inserts or replaces the validators of a URL in the Catalog_Sync database table
+        """
+        self.database.execute(
+            f"INSERT OR REPLACE INTO {self.TABLE_NAME} (url, etag, last_modified, content_hash)"
+            " VALUES (?, ?, ?, ?)",
+            (item["url"], item["etag"], item["last_modified"], item["content_hash"]),
+        )
+        return True
@@ -0,0 +1,137 @@
+"""
+SQLite Leetcode Question table module
+"""
+
+from typing import Dict, Iterable, List
+from ..db_decorators import is_valid_item, validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteLeetcodeQuestionsTable():
+    """
+    Table to hold all questions pulled from Leetcode
+    """
+    TABLE_FIELDS = ["id", "title", "title_slug", "difficulty"]
+    TABLE_NAME = "Leetcode_Question"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            title_slug TEXT NOT NULL,
+            difficulty INTEGER NOT NULL
+        )""",
+    ]
+    INSERT_SQL = (
+        f"INSERT OR IGNORE INTO {TABLE_NAME} (id, title, title_slug, difficulty)"
+        " VALUES (?, ?, ?, ?)"
+    )
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    def insert_many(self, items: List[dict]) -> int:
+        """
+        Inserts a collection of items into the Leetcode_Question database
+        table. Items with an existing ID are skipped.
+        """
+        valid_items = [item for item in items if is_valid_item(item, self.TABLE_FIELDS)]
+        with self.database.transaction():
+            cursor = self.database.executemany(
+                self.INSERT_SQL, (self._row(item) for item in valid_items)
+            )
+        return cursor.rowcount
+
+    def snapshot(self) -> Dict[int, dict]:
+        """
+        Copies the questions of the Leetcode_Question database table by id, for
+        `diff` to compare against
+        """
+        return {question["id"]: question for question in self.loadall()}
+
+    def diff(self, items: Iterable[dict], existing: Dict[int, dict]) -> dict:
+        """
+        Compares a full copy of the Leetcode catalog with a `snapshot` of the
+        Leetcode_Question database table. Invalid items are skipped.
+
+        Returns a change set of the `new` and `changed` items, the `removed`
+        questions that are missing from `items`, and the number of `unchanged` items.
+        """
+        new_questions = {}
+        changed_questions = {}
+        unchanged = set()
+        for item in items:
+            if not is_valid_item(item, self.TABLE_FIELDS):
+                continue
+            if item["id"] not in existing:
+                new_questions[item["id"]] = item
+            elif any(existing[item["id"]][field] != item[field] for field in self.TABLE_FIELDS):
+                changed_questions[item["id"]] = item
+            else:
+                unchanged.add(item["id"])
+        return {
+            "new": list(new_questions.values()),
+            "changed": list(changed_questions.values()),
+            "removed": [
+                question for question in existing.values()
+                if question["id"] not in unchanged and question["id"] not in changed_questions
+            ],
+            "unchanged": len(unchanged),
+        }
+
+    def apply_changes(self, changes: dict) -> None:
+        """
+        Writes a change set made by `diff` to the Leetcode_Question database
+        table in a single transaction
+        """
+        with self.database.transaction():
+            self.database.executemany(
+                self.INSERT_SQL, (self._row(item) for item in changes["new"])
+            )
+            self.database.executemany(
+                f"UPDATE {self.TABLE_NAME} SET title = ?, title_slug = ?, difficulty = ?"
+                " WHERE id = ?",
+                (
+                    (item["title"], item["title_slug"], item["difficulty"], item["id"])
+                    for item in changes["changed"]
+                ),
+            )
+            self.database.executemany(
+                f"DELETE FROM {self.TABLE_NAME} WHERE id = ?",
+                ((question["id"],) for question in changes["removed"]),
+            )
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def insert(self, item: dict) -> bool:
+        """
+        Inserts an item into the Leetcode_Question database table
+        """
+        # Prevent duplicate ID's
+        cursor = self.database.execute(self.INSERT_SQL, self._row(item))
+        return cursor.rowcount > 0
+
+    def load(self, question_id):
+        """
+        Loads a single item by question_id in the Leetcode_Question database table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE id = ?", (question_id,)
+        )
+
+    def loadall(self) -> List[dict]:
+        """
+        Loads all items in the Leetcode_Question database table
+        """
+        return self.database.query(f"SELECT * FROM {self.TABLE_NAME} ORDER BY rowid")
+
+    def delete(self, question_id: int):
+        """
+        Deletes an item in the Leetcode_Question database table
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE id = ?", (question_id,)
+        )
+        return [question_id] if cursor.rowcount > 0 else []
+
+    def _row(self, item: dict) -> tuple:
+        return tuple(item[field] for field in self.TABLE_FIELDS)
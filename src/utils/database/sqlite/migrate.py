@@ -0,0 +1,71 @@
+"""
+TinyDB to SQLite migration module
+"""
+
+import os
+from typing import Dict, List
+from tinydb import TinyDB
+
+from ..completion_log import CompletionLog
+
+from .sqlite_database import SqliteDatabase
+from .users_table import SqliteUsersTable
+from .weeklyquestion_table import SqliteWeeklyQuestionTable
+from .leetcode_question_table import SqliteLeetcodeQuestionsTable
+from .weekly_challenge_table import SqliteWeeklyChallengeTable
+from .question_completions_table import SqliteQuestionCompletionsTable
+from .submission_watermark_table import SqliteSubmissionWatermarkTable
+from .catalog_sync_table import SqliteCatalogSyncTable
+
+SQLITE_TABLES = [
+    SqliteUsersTable,
+    SqliteWeeklyQuestionTable,
+    SqliteLeetcodeQuestionsTable,
+    SqliteWeeklyChallengeTable,
+    SqliteQuestionCompletionsTable,
+    SqliteSubmissionWatermarkTable,
+    SqliteCatalogSyncTable,
+]
+
+
+def migrate_from_tinydb(tinydb_path: str, database: SqliteDatabase) -> Dict[str, int]:
+    """
+    Copies every table of an existing TinyDB database file into a SQLite database.
+
+    Rows are inserted with `INSERT OR IGNORE`, so rows that already exist in the
+    SQLite database (or duplicates in the TinyDB file) are skipped and running the
+    migration twice is harmless. Everything is copied in a single transaction.
+
+    Question completions kept in a completions log next to the TinyDB file
+    (`DATABASE_COMPLETIONS_LOG`) are copied along with those in the file.
+
+    Returns the number of rows copied per table.
+    """
+    if not os.path.exists(tinydb_path):
+        raise FileNotFoundError(f"TinyDB database `{tinydb_path}` does not exist")
+
+    source = TinyDB(tinydb_path, access_mode="r")
+    counts = {}
+    try:
+        with database.transaction():
+            for table_class in SQLITE_TABLES:
+                table_class(database)
+                fields = table_class.TABLE_FIELDS + getattr(table_class, "OPTIONAL_FIELDS", [])
+                rows = source.table(table_class.TABLE_NAME).all()
+                if table_class is SqliteQuestionCompletionsTable:
+                    rows = _with_logged_completions(tinydb_path, rows)
+                cursor = database.executemany(
+                    f"INSERT OR IGNORE INTO {table_class.TABLE_NAME} ({', '.join(fields)})"
+                    f" VALUES ({', '.join('?' for _ in fields)})",
+                    (tuple(row.get(field) for field in fields) for row in rows),
+                )
+                counts[table_class.TABLE_NAME] = cursor.rowcount
+    finally:
+        source.close()
+    return counts
+
+
+def _with_logged_completions(tinydb_path: str, rows: List[dict]) -> List[dict]:
+    # With the completions log, new completions live in the log instead of the file
+    log = CompletionLog(tinydb_path)
+    return rows + log.load() if log.exists() else rows
@@ -0,0 +1,87 @@
+"""
+SQLite Question Completions module
+"""
+
+from typing import List
+from ..db_decorators import validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteQuestionCompletionsTable():
+    """
+    Table to store all completed questions by leetcode user ID & title slug, with
+    the time the question was solved
+    """
+    TABLE_FIELDS = ["leetcode_id", "title_slug"]
+    # Completions recorded before they kept the time they were solved have none
+    OPTIONAL_FIELDS = ["timestamp"]
+    TABLE_NAME = "Question_Completions"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            leetcode_id TEXT NOT NULL,
+            title_slug TEXT NOT NULL,
+            timestamp INTEGER,
+            PRIMARY KEY (leetcode_id, title_slug)
+        ) WITHOUT ROWID""",
+    ]
+    INSERT_SQL = (
+        f"INSERT OR IGNORE INTO {TABLE_NAME} (leetcode_id, title_slug, timestamp) VALUES (?, ?, ?)"
+    )
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+        columns = self.database.query(f"PRAGMA table_info({self.TABLE_NAME})")
+        if "timestamp" not in [column["name"] for column in columns]:
+            # Tables created before completions kept the time they were solved
+            self.database.execute(f"ALTER TABLE {self.TABLE_NAME} ADD COLUMN timestamp INTEGER")
+
+    @validate_insert(required_fields=TABLE_FIELDS, optional_fields=OPTIONAL_FIELDS)
+    def insert(self, item: dict) -> bool:
+        """
+        Inserts a single item of leetcode_id, title_slug and optionally timestamp to
+        QuestionCompletions database table
+        """
+        cursor = self.database.execute(
+            self.INSERT_SQL, (item["leetcode_id"], item["title_slug"], item.get("timestamp"))
+        )
+        return cursor.rowcount > 0
+
+    def insert_many(self, leetcode_id: str, items: List[dict]) -> int:
+        """
+        Inserts a collection of items into the Question Completions database table
+        in a single transaction
+        """
+        with self.database.transaction():
+            cursor = self.database.executemany(
+                self.INSERT_SQL,
+                ((leetcode_id, item["title_slug"], item.get("timestamp")) for item in items),
+            )
+        return cursor.rowcount
+
+    def load(self, leetcode_id: str, title_slug: str):
+        """
+        Load a single item by leetcode_id and title_slug in the Question Completions database table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE leetcode_id = ? AND title_slug = ?",
+            (leetcode_id, title_slug),
+        )
+
+    def load_all_title_slugs_by_user(self, leetcode_id):
+        """
+        Loads a list of all title slugs in the Question Completions database table
+        """
+        results = self.database.query(
+            f"SELECT title_slug FROM {self.TABLE_NAME} WHERE leetcode_id = ?", (leetcode_id,)
+        )
+        return [item["title_slug"] for item in results]
+
+    def check_completion(self, leetcode_id: str, title_slug: str) -> bool:
+        """
+        Checks if a user has completed a question per the Question Completions database table
+        """
+        completed = self.load(leetcode_id, title_slug)
+        if completed:
+            return True
+        return False
@@ -0,0 +1,98 @@
+"""
+SQLite Database module
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
+
+
+def dict_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    """
+    Row factory returning rows as dicts, matching what the TinyDB tables return
+    """
+    return {column[0]: row[index] for index, column in enumerate(cursor.description)}
+
+
+class SqliteDatabase:
+    """
+    A thin wrapper around a stdlib `sqlite3` connection shared by the SQLite tables.
+
+    The database runs in WAL mode so readers don't block the writer. Statements
+    outside of `transaction()` are committed immediately. The connection is shared
+    between threads, so every statement runs under a lock.
+    """
+
+    def __init__(self, database_path: str):
+        self.connection = sqlite3.connect(
+            database_path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.row_factory = dict_factory
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.lock = threading.RLock()
+        self.transaction_depth = 0
+
+    def execute(self, sql: str, parameters: Iterable = ()) -> sqlite3.Cursor:
+        """
+        Executes a single statement
+        """
+        with self.lock:
+            return self.connection.execute(sql, tuple(parameters))
+
+    def executemany(self, sql: str, parameters: Iterable[Iterable]) -> sqlite3.Cursor:
+        """
+        Executes a statement once per set of parameters
+        """
+        with self.lock:
+            return self.connection.executemany(sql, (tuple(p) for p in parameters))
+
+    def query(self, sql: str, parameters: Iterable = ()) -> List[dict]:
+        """
+        Executes a query and returns all resulting rows
+        """
+        with self.lock:
+            return self.connection.execute(sql, tuple(parameters)).fetchall()
+
+    def query_one(self, sql: str, parameters: Iterable = ()) -> Optional[dict]:
+        """
+        Executes a query and returns the first resulting row, if any
+        """
+        with self.lock:
+            return self.connection.execute(sql, tuple(parameters)).fetchone()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Runs the statements of a `with` block in one transaction. The transaction
+        is committed when the block exits and rolled back if it raises.
+        Nested transactions join the outermost one.
+        """
+        with self.lock:
+            if self.transaction_depth == 0:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self.transaction_depth += 1
+            try:
+                yield
+            except BaseException:
+                self.transaction_depth -= 1
+                if self.transaction_depth == 0:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self.transaction_depth -= 1
+            if self.transaction_depth == 0:
+                self.connection.execute("COMMIT")
+
+    def flush(self) -> None:
+        """
+        Checkpoints the write-ahead log so every committed change is in the main
+        database file and synced to disk
+        """
+        self.execute("PRAGMA wal_checkpoint(FULL)")
+
+    def close(self) -> None:
+        """
+        Closes the connection
+        """
+        self.connection.close()
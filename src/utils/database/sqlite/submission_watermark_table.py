@@ -0,0 +1,46 @@
+"""
+SQLite Submission Watermark table module
+"""
+
+from .sqlite_database import SqliteDatabase
+
+class SqliteSubmissionWatermarkTable():
+    """
+    Table to hold the timestamp of the latest submission ingested per leetcode user ID.
+    Submissions at or below a user's watermark have been ingested already.
+    """
+    TABLE_FIELDS = ["leetcode_id", "timestamp"]
+    TABLE_NAME = "Submission_Watermark"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            leetcode_id TEXT PRIMARY KEY,
+            timestamp INTEGER NOT NULL
+        ) WITHOUT ROWID""",
+    ]
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    def load(self, leetcode_id: str) -> int:
+        """
+        Loads the watermark of a user, 0 if none of their submissions were ingested yet
+        """
+        watermark = self.database.query_one(
+            f"SELECT timestamp FROM {self.TABLE_NAME} WHERE leetcode_id = ?", (leetcode_id,)
+        )
+        return watermark["timestamp"] if watermark else 0
+
+    def advance(self, leetcode_id: str, timestamp: int) -> bool:
+        """
+        Raises the watermark of a user to `timestamp`. Returns False if the
+        watermark is already at or above it.
+        """
+        cursor = self.database.execute(
+            f"""INSERT INTO {self.TABLE_NAME} (leetcode_id, timestamp) VALUES (?, ?)
+            ON CONFLICT (leetcode_id) DO UPDATE SET timestamp = excluded.timestamp
+            WHERE excluded.timestamp > {self.TABLE_NAME}.timestamp""",
+            (leetcode_id, timestamp),
+        )
+        return cursor.rowcount > 0
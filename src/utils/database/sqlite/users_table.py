@@ -0,0 +1,81 @@
+"""
+SQLite User Table module
+"""
+
+from typing import List
+from ..db_decorators import validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteUsersTable():
+    """
+    Table to hold all registered users
+    """
+    TABLE_FIELDS = ["discord_id", "leetcode_id"]
+    TABLE_NAME = "Leetcode_User"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            discord_id TEXT NOT NULL UNIQUE,
+            leetcode_id TEXT NOT NULL UNIQUE
+        )""",
+    ]
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    def loadall(self) -> List[dict]:
+        """
+        Loads all items in the Leetcode_User database table
+        """
+        return self.database.query(f"SELECT * FROM {self.TABLE_NAME} ORDER BY rowid")
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def insert(self, item: dict) -> bool:
+        """
+        Inserts an item in the LeetcodeUser database table
+        """
+        # Both discord_id and leetcode_id are unique
+        cursor = self.database.execute(
+            f"INSERT OR IGNORE INTO {self.TABLE_NAME} (discord_id, leetcode_id) VALUES (?, ?)",
+            (item["discord_id"], item["leetcode_id"]),
+        )
+        return cursor.rowcount > 0
+
+    def load_by_discord_id(self, discord_id):
+        """
+        Loads a single item by discord id in the "Leetcode_User" database table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE discord_id = ?", (discord_id,)
+        )
+
+    def load_by_leetcode_id(self, leetcode_id):
+        """
+        Loads a single item by leetcode id in the "Leetcode_User" database table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE leetcode_id = ?", (leetcode_id,)
+        )
+
+    def delete_by_leetcode_id(self, leetcode_id) -> bool:
+        """
+        Deletes an item by leetcode_id in the Leetcode_User database table
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE leetcode_id = ?", (leetcode_id,)
+        )
+
+        # Will return True if an item was successfully deleted
+        return cursor.rowcount > 0
+
+    def delete_by_discord_id(self, discord_id) -> bool:
+        """
+        Deletes an item by discord_id in the Leetcode_User database table
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE discord_id = ?", (discord_id,)
+        )
+
+        # Will return True if an item was successfully deleted
+        return cursor.rowcount > 0
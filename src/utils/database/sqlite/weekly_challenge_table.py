@@ -0,0 +1,74 @@
+"""
+SQLite Weekly Challenge table module
+"""
+
+from typing import List
+from ..db_decorators import validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteWeeklyChallengeTable():
+    """
+    Table to hold all Weekly Challenges after being generated
+    """
+    TABLE_FIELDS = ["id", "date"]
+    TABLE_NAME = "Weekly_Challenge"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            id INTEGER PRIMARY KEY,
+            date REAL NOT NULL
+        )""",
+        f"CREATE INDEX IF NOT EXISTS {TABLE_NAME}_date ON {TABLE_NAME} (date)",
+    ]
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def insert(self, item: dict) -> bool:
+        """
+        "Inserts an item to the Weekly_Challenge table"
+        """
+
+        # Prevent duplicate ID's
+        cursor = self.database.execute(
+            f"INSERT OR IGNORE INTO {self.TABLE_NAME} (id, date) VALUES (?, ?)",
+            (item["id"], item["date"]),
+        )
+        return cursor.rowcount > 0
+
+    def load(self, challenge_id):
+        """
+        Loads an item by id from the Weekly_Challenge table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE id = ?", (challenge_id,)
+        )
+
+    def load_by_date_range(self, start: float, end: float) -> List[dict]:
+        """
+        Loads all items dated between the `start` and `end` timestamps (inclusive),
+        ordered by date
+        """
+        return self.database.query(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE date BETWEEN ? AND ? ORDER BY date, rowid",
+            (start, end),
+        )
+
+    def get_latest(self):
+        """
+        Loads the item with the most recent date property
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} ORDER BY date DESC, rowid DESC LIMIT 1"
+        )
+
+    def delete(self, challenge_id) -> bool:
+        """
+        Deletes an item by id from the Weekly_Challenge table
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE id = ?", (challenge_id,)
+        )
+        return cursor.rowcount > 0
@@ -0,0 +1,112 @@
+"""
+SQLite Weekly Question table module
+"""
+
+from typing import List
+from ..db_decorators import is_valid_item, validate_insert
+from .sqlite_database import SqliteDatabase
+
+class SqliteWeeklyQuestionTable:
+    """
+    A class to act on the weeklyquestion_table of the database
+    """
+    TABLE_FIELDS = [
+        "id",
+        "challenge_id",
+        "title",
+        "title_slug",
+        "difficulty",
+    ]
+    TABLE_NAME = "Weekly_Question"
+    SCHEMA = [
+        f"""CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            id INTEGER NOT NULL,
+            challenge_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            title_slug TEXT NOT NULL UNIQUE,
+            difficulty INTEGER NOT NULL
+        )""",
+        f"CREATE INDEX IF NOT EXISTS {TABLE_NAME}_challenge_id ON {TABLE_NAME} (challenge_id)",
+    ]
+    INSERT_SQL = (
+        f"INSERT OR IGNORE INTO {TABLE_NAME}"
+        " (id, challenge_id, title, title_slug, difficulty) VALUES (?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, database: SqliteDatabase):
+        self.database = database
+        for statement in self.SCHEMA:
+            self.database.execute(statement)
+
+    @validate_insert(required_fields=TABLE_FIELDS)
+    def insert(self, item: dict) -> bool:
+        """
+        Inserts an item into the Weekly_Question database table
+        """
+        # Prevent duplicate title slugs
+        cursor = self.database.execute(self.INSERT_SQL, self._row(item))
+        return cursor.rowcount > 0
+
+    def insert_many(self, items: List[dict]) -> int:
+        """
+        Inserts a collection of items into the Weekly_Question database table in
+        a single transaction. Invalid items and items with a title slug that is
+        already taken are skipped.
+        """
+        valid_items = [item for item in items if is_valid_item(item, self.TABLE_FIELDS)]
+        with self.database.transaction():
+            cursor = self.database.executemany(
+                self.INSERT_SQL, (self._row(item) for item in valid_items)
+            )
+        return cursor.rowcount
+
+    def load_by_challenge_id(self, challenge_id) -> list:
+        """
+        Loads multiple items by challenge id in the Weekly_Question database table
+        """
+        return self.database.query(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE challenge_id = ? ORDER BY rowid",
+            (challenge_id,),
+        )
+
+    def load_by_title_slug(self, title_slug):
+        """
+        Loads a single item by title slug in the Weekly_Question database table
+        """
+        return self.database.query_one(
+            f"SELECT * FROM {self.TABLE_NAME} WHERE title_slug = ?", (title_slug,)
+        )
+
+    def delete(self, title_slug) -> bool:
+        """
+        Deletes an item in the Weekly_Question database table
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE title_slug = ?", (title_slug,)
+        )
+        return cursor.rowcount > 0
+
+    def delete_by_challenge_id(self, challenge_id) -> bool:
+        """
+        Deletes multiple items by challenge_id in the Weekly_Question database table
+        called by table_weeklychallenge_delete()
+        """
+        cursor = self.database.execute(
+            f"DELETE FROM {self.TABLE_NAME} WHERE challenge_id = ?", (challenge_id,)
+        )
+        return cursor.rowcount > 0
+
+    def loadall(self) -> List[dict]:
+        """
+        Loads all items in the Weekly_Question database table
+        """
+        return self.database.query(f"SELECT * FROM {self.TABLE_NAME} ORDER BY rowid")
+
+    def load_all_title_slugs_by_challenge(self, challenge_id):
+        """
+        Loads a list of all title slugs in the Weekly_Question database table
+        """
+        return [item["title_slug"] for item in self.load_by_challenge_id(challenge_id)]
+
+    def _row(self, item: dict) -> tuple:
+        return tuple(item[field] for field in self.TABLE_FIELDS)
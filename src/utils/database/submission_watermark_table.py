@@ -0,0 +1,49 @@
+"""
+Submission Watermark table module
+"""
+
+from tinydb import TinyDB
+from tinydb.table import Document
+from .table_index import UniqueIndex
+
+class SubmissionWatermarkTable():
+    """
+    Table to hold the timestamp of the latest submission ingested per leetcode user ID.
+    Submissions at or below a user's watermark have been ingested already.
+    """
+    TABLE_FIELDS = ["leetcode_id", "timestamp"]
+    TABLE_NAME = "Submission_Watermark"
+
+    def __init__(self, database: TinyDB):
+        self.table = database.table(self.TABLE_NAME)
+        self.leetcode_index = UniqueIndex("leetcode_id")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory index from the Submission_Watermark database table
+        """
+        self.leetcode_index.rebuild(self.table.all())
+
+    def load(self, leetcode_id: str) -> int:
+        """
+        Loads the watermark of a user, 0 if none of their submissions were ingested yet
+        """
+        watermark = self.leetcode_index.get(leetcode_id)
+        return watermark["timestamp"] if watermark else 0
+
+    def advance(self, leetcode_id: str, timestamp: int) -> bool:
+        """
+        Raises the watermark of a user to `timestamp`. Returns False if the
+        watermark is already at or above it.
+        """
+        watermark = self.leetcode_index.get(leetcode_id)
+        if watermark is None:
+            item = {"leetcode_id": leetcode_id, "timestamp": timestamp}
+            self.leetcode_index.add(Document(item, self.table.insert(item)))
+            return True
+        if watermark["timestamp"] >= timestamp:
+            return False
+        self.table.update({"timestamp": timestamp}, doc_ids=[watermark.doc_id])
+        watermark["timestamp"] = timestamp
+        return True
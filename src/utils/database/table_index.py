@@ -0,0 +1,111 @@
+"""
+In-memory index module for database tables
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class UniqueIndex:
+    """
+    Maps a key built from one or more fields of a row to that row.
+
+    Table classes keep one of these per unique key so lookups don't need a
+    full `table.search` scan. The index only mirrors what is stored in the
+    table, so every insert and delete on the table must be applied here too.
+    """
+
+    def __init__(self, *fields: str):
+        self.fields = fields
+        self.rows: Dict[Tuple, dict] = {}
+
+    def key(self, item: dict) -> Tuple:
+        """
+        Builds the index key of an item
+        """
+        return tuple(item[field] for field in self.fields)
+
+    def rebuild(self, items: Iterable[dict]) -> None:
+        """
+        Replaces the contents of the index with the given items
+        """
+        self.rows = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: dict) -> bool:
+        """
+        Adds an item to the index. Returns False if the key is already taken.
+        """
+        key = self.key(item)
+        if key in self.rows:
+            return False
+        self.rows[key] = item
+        return True
+
+    def remove(self, item: dict) -> None:
+        """
+        Removes an item from the index if it is present
+        """
+        self.rows.pop(self.key(item), None)
+
+    def get(self, *values) -> Optional[dict]:
+        """
+        Loads the item stored under the given key values
+        """
+        return self.rows.get(tuple(values))
+
+    def contains(self, item: dict) -> bool:
+        """
+        Checks whether the key of an item is already taken
+        """
+        return self.key(item) in self.rows
+
+
+class GroupIndex:
+    """
+    Maps a key built from one or more fields of a row to every row sharing it.
+
+    Used for secondary lookups such as "all completions of a user", which
+    would otherwise be a full `table.search` scan.
+    """
+
+    def __init__(self, *fields: str):
+        self.fields = fields
+        self.groups: Dict[Tuple, List[dict]] = {}
+
+    def key(self, item: dict) -> Tuple:
+        """
+        Builds the index key of an item
+        """
+        return tuple(item[field] for field in self.fields)
+
+    def rebuild(self, items: Iterable[dict]) -> None:
+        """
+        Replaces the contents of the index with the given items
+        """
+        self.groups = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: dict) -> None:
+        """
+        Adds an item to the group of its key
+        """
+        self.groups.setdefault(self.key(item), []).append(item)
+
+    def remove(self, item: dict) -> None:
+        """
+        Removes an item from the group of its key if it is present
+        """
+        key = self.key(item)
+        group = self.groups.get(key, [])
+        if item in group:
+            group.remove(item)
+        if not group:
+            self.groups.pop(key, None)
+
+    def get(self, *values) -> List[dict]:
+        """
+        Loads every item stored under the given key values
+        """
+        return list(self.groups.get(tuple(values), []))
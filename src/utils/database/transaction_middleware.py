@@ -0,0 +1,118 @@
+"""
+Transaction middleware module for TinyDB
+"""
+
+import json
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Iterator
+from tinydb.middlewares import Middleware
+
+
+class CopyOnAccessTables(MutableMapping):
+    """
+    The tables of a database, each copied from `base` the first time it is
+    accessed. `base` itself is never changed, so a transaction only pays for
+    copying the tables it touches.
+    """
+
+    def __init__(self, base: dict):
+        self.base = base
+        self.copies = {}
+        self.deleted = set()
+
+    def __getitem__(self, name):
+        if name not in self.copies:
+            if name in self.deleted or name not in self.base:
+                raise KeyError(name)
+            # TinyDB updates documents in place, so copy them too
+            self.copies[name] = json.loads(json.dumps(self.base[name]))
+        return self.copies[name]
+
+    def __setitem__(self, name, table):
+        self.copies[name] = table
+        self.deleted.discard(name)
+
+    def __delitem__(self, name):
+        if name not in self:
+            raise KeyError(name)
+        self.copies.pop(name, None)
+        self.deleted.add(name)
+
+    def __contains__(self, name):
+        return name in self.copies or (name in self.base and name not in self.deleted)
+
+    def __iter__(self):
+        names = [name for name in self.base if name not in self.deleted]
+        return iter(names + [name for name in self.copies if name not in self.base])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def merged(self) -> dict:
+        """
+        Builds the resulting database: the copied tables, and the others as in `base`
+        """
+        return {
+            name: self.copies[name] if name in self.copies else self.base[name]
+            for name in self
+        }
+
+
+class TransactionMiddleware(Middleware):
+    """
+    TinyDB middleware that can group writes to several tables into one write.
+
+    Inside `transaction()` writes only update a private copy of the tables they
+    touch and reads are served from that copy. When the block exits, the copy is
+    written to the wrapped storage in a single write; if the block raises, the
+    copy is discarded and the storage is left untouched.
+
+    Usage:
+        TinyDB("db.json", storage=TransactionMiddleware(JSONStorage))
+    """
+
+    def __init__(self, storage_cls):
+        super().__init__(storage_cls)
+        self.pending = None
+        self.depth = 0
+
+    def read(self):
+        """
+        Reads the pending copy inside a transaction, the wrapped storage otherwise
+        """
+        if self.pending is not None:
+            return self.pending
+        return self.storage.read()
+
+    def write(self, data):
+        """
+        Writes to the pending copy inside a transaction, the wrapped storage otherwise
+        """
+        if self.pending is not None:
+            self.pending = data
+        else:
+            self.storage.write(data)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Runs the writes of a `with` block as one write. Nested transactions join
+        the outermost one.
+        """
+        if self.depth == 0:
+            # Work on copies: TinyDB updates documents in place and some storages
+            # (e.g. WriteBehindStorage) hand out their live data
+            self.pending = CopyOnAccessTables(self.storage.read() or {})
+        self.depth += 1
+        try:
+            yield
+        except BaseException:
+            self.depth -= 1
+            if self.depth == 0:
+                self.pending = None
+            raise
+        self.depth -= 1
+        if self.depth == 0:
+            data, self.pending = self.pending, None
+            self.storage.write(data.merged() if isinstance(data, CopyOnAccessTables) else data)
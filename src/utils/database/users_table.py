@@ -3,9 +3,10 @@ User Table module
 """
 
 from typing import List
-from tinydb import TinyDB, where
+from tinydb import TinyDB
 from tinydb.table import Document
 from .db_decorators import validate_insert
+from .table_index import UniqueIndex
 
 class UsersTable():
     """
@@ -16,6 +17,34 @@ class UsersTable():
 
     def __init__(self, database: TinyDB):
         self.table = database.table(self.TABLE_NAME)
+        self.discord_index = UniqueIndex("discord_id")
+        self.leetcode_index = UniqueIndex("leetcode_id")
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory indexes from the Leetcode_User database table.
+
+        Databases written before both ids were enforced unique may hold several
+        users sharing a discord_id or leetcode_id. The indexes can only track one
+        of them, so the first registration is kept and the others are removed.
+        """
+        self.discord_index.rebuild([])
+        self.leetcode_index.rebuild([])
+        duplicates = []
+        for user in self.table.all():
+            if self.discord_index.contains(user) or self.leetcode_index.contains(user):
+                duplicates.append(user)
+                continue
+            self.discord_index.add(user)
+            self.leetcode_index.add(user)
+        for user in duplicates:
+            print(
+                f"Removing duplicate registration of Discord user {user['discord_id']}"
+                f" as Leetcode user {user['leetcode_id']}"
+            )
+        if duplicates:
+            self.table.remove(doc_ids=[user.doc_id for user in duplicates])
 
     def loadall(self) -> List[Document]:
         """
@@ -28,47 +57,45 @@ class UsersTable():
         """
         Inserts an item in the LeetcodeUser database table
         """
-        matches = self.table.search(
-            where("discord_id") == item["discord_id"]
-            or where("leetcode_id") == item["leetcode_id"]
-        )
-        if len(matches) == 0:
-            self.table.insert(item)
-            return True
-        return False
+        # Both discord_id and leetcode_id are unique
+        if self.discord_index.contains(item) or self.leetcode_index.contains(item):
+            return False
+        doc_id = self.table.insert(item)
+        user = Document(item, doc_id)
+        self.discord_index.add(user)
+        self.leetcode_index.add(user)
+        return True
 
     def load_by_discord_id(self, discord_id):
         """
         Loads a single item by discord id in the "Leetcode_User" database table
         """
-        users = self.table.search(where("discord_id") == discord_id)
-        if len(users) == 0:
-            return None
-        return users[0]
+        return self.discord_index.get(discord_id)
 
     def load_by_leetcode_id(self, leetcode_id):
         """
         Loads a single item by leetcode id in the "Leetcode_User" database table
         """
-        users = self.table.search(where("leetcode_id") == leetcode_id)
-        if len(users) == 0:
-            return None
-        return users[0]
+        return self.leetcode_index.get(leetcode_id)
 
     def delete_by_leetcode_id(self, leetcode_id) -> bool:
         """
         Deletes an item by leetcode_id in the Leetcode_User database table
         """
-        results = self.table.remove(where("leetcode_id") == leetcode_id)
-
-        # Will return True if an item was successfully deleted
-        return len(results) > 0
+        return self._delete(self.leetcode_index.get(leetcode_id))
 
     def delete_by_discord_id(self, discord_id) -> bool:
         """
         Deletes an item by discord_id in the Leetcode_User database table
         """
-        results = self.table.remove(where("discord_id") == discord_id)
+        return self._delete(self.discord_index.get(discord_id))
+
+    def _delete(self, user: Document) -> bool:
+        if user is None:
+            return False
+        results = self.table.remove(doc_ids=[user.doc_id])
+        self.discord_index.remove(user)
+        self.leetcode_index.remove(user)
 
         # Will return True if an item was successfully deleted
         return len(results) > 0
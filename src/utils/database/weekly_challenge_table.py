@@ -2,8 +2,12 @@
 Weekly Challenge table module
 """
 
-from tinydb import TinyDB, where
+from bisect import bisect_left, bisect_right
+from typing import List
+from tinydb import TinyDB
+from tinydb.table import Document
 from .db_decorators import validate_insert
+from .table_index import UniqueIndex
 
 class WeeklyChallengeTable():
     """
@@ -14,6 +18,20 @@ class WeeklyChallengeTable():
 
     def __init__(self, database: TinyDB):
         self.table = database.table(self.TABLE_NAME)
+        self.id_index = UniqueIndex("id")
+        # Challenges ordered by date, with their dates kept alongside for bisecting
+        self.by_date: List[Document] = []
+        self.dates: List[float] = []
+        self.reload()
+
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory indexes from the Weekly_Challenge database table
+        """
+        challenges = self.table.all()
+        self.id_index.rebuild(challenges)
+        self.by_date = sorted(challenges, key=lambda challenge: challenge["date"])
+        self.dates = [challenge["date"] for challenge in self.by_date]
 
     @validate_insert(required_fields=TABLE_FIELDS)
     def insert(self, item: dict) -> bool:
@@ -22,26 +40,47 @@ class WeeklyChallengeTable():
         """
 
         # Prevent duplicate ID's
-        if len(self.table.search(where("id") == item["id"])) == 0:
-            self.table.insert(item)
-            return True
-        return False
+        if self.id_index.contains(item):
+            return False
+        doc_id = self.table.insert(item)
+        challenge = Document(item, doc_id)
+        self.id_index.add(challenge)
+        position = bisect_right(self.dates, challenge["date"])
+        self.dates.insert(position, challenge["date"])
+        self.by_date.insert(position, challenge)
+        return True
 
     def load(self, challenge_id):
         """
         Loads an item by id from the Weekly_Challenge table
         """
-        results = self.table.search(where("id") == challenge_id)
-        if len(results) == 0:
-            return None
-        return results[0]
+        return self.id_index.get(challenge_id)
+
+    def load_by_date_range(self, start: float, end: float) -> List[Document]:
+        """
+        Loads all items dated between the `start` and `end` timestamps (inclusive),
+        ordered by date
+        """
+        return self.by_date[bisect_left(self.dates, start):bisect_right(self.dates, end)]
 
     def get_latest(self):
         """
         Loads the item with the most recent date property
         """
-        results = self.table.all()
-        if len(results) == 0:
+        if len(self.by_date) == 0:
             return None
-        sorted_results = sorted(results, key=lambda challenge: challenge["date"])
-        return sorted_results[-1]
+        return self.by_date[-1]
+
+    def delete(self, challenge_id) -> bool:
+        """
+        Deletes an item by id from the Weekly_Challenge table
+        """
+        challenge = self.id_index.get(challenge_id)
+        if challenge is None:
+            return False
+        self.id_index.remove(challenge)
+        position = self.by_date.index(challenge, bisect_left(self.dates, challenge["date"]))
+        del self.dates[position]
+        del self.by_date[position]
+        results = self.table.remove(doc_ids=[challenge.doc_id])
+        return len(results) > 0
@@ -3,9 +3,10 @@ Weekly Question table module
 """
 
 from typing import List
-from tinydb import TinyDB, where
+from tinydb import TinyDB
 from tinydb.table import Document
-from .db_decorators import validate_insert
+from .db_decorators import is_valid_item, validate_insert
+from .table_index import GroupIndex, UniqueIndex
 
 class WeeklyQuestionTable:
     """
@@ -22,7 +23,16 @@ class WeeklyQuestionTable:
 
     def __init__(self, database: TinyDB):
         self.table = database.table(self.TABLE_NAME)
+        self.slug_index = UniqueIndex("title_slug")
+        self.challenge_index = GroupIndex("challenge_id")
+        self.reload()
 
+    def reload(self) -> None:
+        """
+        Rebuilds the in-memory indexes from the Weekly_Question database table
+        """
+        self.slug_index.rebuild(self.table.all())
+        self.challenge_index.rebuild(self.slug_index.rows.values())
 
     @validate_insert(required_fields=TABLE_FIELDS)
     def insert(self, item: dict) -> bool:
@@ -30,40 +40,51 @@ class WeeklyQuestionTable:
         Inserts an item into the Weekly_Question database table
         """
         # Prevent duplicate ID's
-        if len(self.table.search(where("title_slug") == item["title_slug"])) == 0:
-            self.table.insert(item)
-            return True
-        return False
+        if self.slug_index.contains(item):
+            return False
+        self._insert_multiple([item])
+        return True
+
+    def insert_many(self, items: List[dict]) -> int:
+        """
+        Inserts a collection of items into the Weekly_Question database table in
+        a single write. Invalid items and items with a title slug that is already
+        taken are skipped.
+        """
+        new_questions = {}
+        for item in items:
+            if is_valid_item(item, self.TABLE_FIELDS) and not self.slug_index.contains(item):
+                new_questions.setdefault(item["title_slug"], item)
+        self._insert_multiple(list(new_questions.values()))
+        return len(new_questions)
 
     def load_by_challenge_id(self, challenge_id) -> list:
         """
         Loads multiple items by challenge id in the Weekly_Question database table
         """
-        return self.table.search(where("challenge_id") == challenge_id)
+        return self.challenge_index.get(challenge_id)
 
     def load_by_title_slug(self, title_slug):
         """
         Loads a single item by title slug in the Weekly_Question database table
         """
-        questions = self.table.search(where("title_slug") == title_slug)
-        if len(questions) == 0:
-            return None
-        return questions[0]
+        return self.slug_index.get(title_slug)
 
     def delete(self, title_slug) -> bool:
         """
         Deletes an item in the Weekly_Question database table
         """
-        results = self.table.remove(where("title_slug") == title_slug)
-        return len(results) > 0
+        question = self.slug_index.get(title_slug)
+        if question is None:
+            return False
+        return self._delete([question])
 
     def delete_by_challenge_id(self, challenge_id) -> bool:
         """
         Deletes multiple items by challenge_id in the Weekly_Question database table
         called by table_weeklychallenge_delete()
         """
-        results = self.table.remove(where("challenge_id") == challenge_id)
-        return len(results) > 0
+        return self._delete(self.challenge_index.get(challenge_id))
 
     def loadall(self) -> List[Document]:
         """
@@ -75,8 +96,22 @@ class WeeklyQuestionTable:
         """
         Loads a list of all title slugs in the Weekly_Question database table
         """
-        results = self.table.search(where("challenge_id") == challenge_id)
-        title_slugs = []
-        for item in results:
-            title_slugs.append(item["title_slug"])
-        return title_slugs
+        return [item["title_slug"] for item in self.challenge_index.get(challenge_id)]
+
+    def _insert_multiple(self, items: List[dict]) -> None:
+        if len(items) == 0:
+            return
+        doc_ids = self.table.insert_multiple(items)
+        for item, doc_id in zip(items, doc_ids):
+            question = Document(item, doc_id)
+            self.slug_index.add(question)
+            self.challenge_index.add(question)
+
+    def _delete(self, questions: List[Document]) -> bool:
+        if len(questions) == 0:
+            return False
+        for question in questions:
+            self.slug_index.remove(question)
+            self.challenge_index.remove(question)
+        results = self.table.remove(doc_ids=[question.doc_id for question in questions])
+        return len(results) > 0
@@ -0,0 +1,98 @@
+"""
+Write-behind storage module for TinyDB
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, Optional, Tuple
+from tinydb.storages import Storage
+
+from .atomic_file import atomic_write
+
+
+# pylint: disable-next=too-many-instance-attributes
+class WriteBehindStorage(Storage):
+    """
+    TinyDB storage that keeps the whole database in memory and batches writes.
+
+    The JSON file is parsed once when the storage is opened. Reads are served
+    from memory and writes only mark the data as dirty. Dirty data is written
+    back to disk once `flush_writes` writes have accumulated, every
+    `flush_interval` seconds (a value of 0 disables the timer), when `flush()`
+    is called, or when the storage is closed. Every write back is atomic
+    (see `atomic_write`).
+
+    TinyDB changes the data it reads in place, outside of the storage, so write
+    backs serialize a snapshot taken by `write()` instead of the live data.
+
+    Usage:
+        TinyDB("db.json", storage=WriteBehindStorage, flush_interval=5, flush_writes=100)
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, flush_writes: int = 100):
+        super().__init__()
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_writes = flush_writes
+        self.lock = threading.RLock()
+        self.data = self._load()
+        self.pending_writes = 0
+        # Table name -> (table written, copy of it) as of the last write
+        self.snapshot: Dict[str, Tuple[dict, dict]] = {}
+        self.closed = threading.Event()
+        if self.flush_interval > 0:
+            threading.Thread(target=self._flush_periodically, daemon=True).start()
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self.lock:
+            return self.data
+
+    def write(self, data: Dict[str, Dict[str, Any]]) -> None:
+        with self.lock:
+            self.data = data
+            self._take_snapshot(data)
+            self.pending_writes += 1
+            if self.pending_writes >= self.flush_writes:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes pending changes to disk
+        """
+        with self.lock:
+            if self.pending_writes > 0:
+                tables = {name: table for name, (_, table) in self.snapshot.items()}
+                atomic_write(self.path, json.dumps(tables))
+                self.pending_writes = 0
+
+    def close(self) -> None:
+        self.closed.set()
+        self.flush()
+
+    def _load(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return None
+        with open(self.path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def _take_snapshot(self, data: Dict[str, Dict[str, Any]]) -> None:
+        # TinyDB replaces the dict of a table whenever the table changes, so only
+        # tables replaced since the last write need copying. Documents are copied
+        # too since TinyDB updates them in place.
+        snapshot = {}
+        for name, table in data.items():
+            previous = self.snapshot.get(name)
+            if previous is not None and previous[0] is table:
+                snapshot[name] = previous
+            else:
+                snapshot[name] = (table, {doc_id: dict(doc) for doc_id, doc in table.items()})
+        self.snapshot = snapshot
+
+    def _flush_periodically(self) -> None:
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                # Keep the timer alive, the next write back may well succeed
+                print(f"Writing back {self.path} failed: {error!r}")
@@ -1,11 +1,16 @@
 """
     Discord Utility module
 """
+import asyncio
+import requests
 from discord import Intents
-from discord.ext import commands
+from discord.ext import commands, tasks
 from .commands.command_abc import CommandAbstract
 from .commands.command_util import CommandUtil
 from .commands.command_parser import CommandParser
+from .command_runner import CommandRunner
+from .completion_poller import CompletionPoller
+from .progress_message import ProgressMessage
 
 intents = Intents.default()
 intents.message_content = True
@@ -28,8 +33,59 @@ class DiscordUtil(commands.Bot, CommandAbstract):
 
         self.command_util = CommandUtil(database, leetcode, discord_mode=True)
         self.parser = CommandParser(debug_commands=[])
+        # Commands run on worker threads, so a slow one never blocks the gateway
+        self.runner = CommandRunner(
+            max_workers=kwargs.get("command_workers", 8),
+            per_command_limit=kwargs.get("command_concurrency", 2),
+        )
+        # Seconds between background refreshes of every user's completions, 0 disables them
+        poll_interval = kwargs.get("completion_poll_interval", 0)
+        if poll_interval > 0:
+            self.command_util.poller = CompletionPoller(self.command_util, poll_interval)
+        self.catalog_sync = kwargs.get("catalog_sync")
+        # Seconds between catalog refreshes, 0 disables them
+        refresh_interval = kwargs.get("catalog_refresh_interval", 0)
+        self.catalog_task = None
+        if self.catalog_sync and refresh_interval > 0:
+            self.catalog_task = tasks.loop(seconds=refresh_interval)(self.refresh_catalog)
+            # Keep refreshing on schedule when Leetcode can't be reached
+            self.catalog_task.add_exception_type(requests.RequestException)
         self.add_commands()
 
+    async def setup_hook(self):
+        """
+        Starts the background tasks once the bot has logged in
+        """
+        self.runner.start()
+        if self.command_util.poller:
+            self.command_util.poller.start()
+        if self.catalog_task:
+            self.catalog_task.start()
+
+    async def close(self):
+        """
+        Stops the background tasks and the command workers, then logs out
+        """
+        if self.catalog_task:
+            self.catalog_task.cancel()
+        if self.command_util.poller:
+            self.command_util.poller.stop()
+        self.runner.stop()
+        await commands.Bot.close(self)
+
+    async def refresh_catalog(self):
+        """
+        Refreshes the Leetcode questions in the database. The refresh runs on a
+        worker thread so commands are still answered meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        counts = await loop.run_in_executor(None, self.catalog_sync.refresh)
+        if counts and any(counts.values()):
+            print(
+                f"Catalog refreshed: {counts['new']} new, {counts['changed']} changed,"
+                f" {counts['removed']} removed questions"
+            )
+
     def _claim(self, **kwargs):
         """
         Associates a leetcode_id with a discord_id in the Leetcode_User table.
@@ -70,12 +126,21 @@ class DiscordUtil(commands.Bot, CommandAbstract):
         """
         return self.command_util.user(kwargs["discord_id"])
 
-    def _group_status(self) -> str:
+    def _group_status(self, **kwargs) -> str:
         """
         Calculates and summarizes the number of users who have completed each question
         in the current challenge
+
+        Keyword Args:
+        - on_progress       Called with a partial summary while users are fetched
+        """
+        return self.command_util.group_status(kwargs.get("on_progress"))
+
+    def _metrics(self) -> str:
         """
-        return self.command_util.group_status()
+        Summarizes performance counters of the bot
+        """
+        return self.command_util.metrics(self.runner.stats())
 
     # Dynamically register Discord async commands
     def add_commands(self):
@@ -98,7 +163,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
                     "discord_id": discord_id,
                     "leetcode_id": leetcode_id
                 }
-                result = self._claim(**kwargs)
+                result = await self.runner.run("claim", self._claim, **kwargs)
                 return_message = result
 
             await ctx.channel.send(return_message)
@@ -113,7 +178,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
             if len(parsed_command.errors) > 0:
                 return_message = "\n".join(parsed_command.errors)
             else:
-                result = self._challenge()
+                result = await self.runner.run("challenge", self._challenge)
                 return_message = result
 
             await ctx.channel.send(return_message)
@@ -129,7 +194,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
                 return_message = "\n".join(parsed_command.errors)
             else:
                 kwargs = {"discord_id": discord_id}
-                result = self._rank(**kwargs)
+                result = await self.runner.run("rank", self._rank, **kwargs)
                 return_message = f"```\n{result}\n```"
 
             await ctx.channel.send(return_message)
@@ -145,7 +210,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
                 return_message = "\n".join(parsed_command.errors)
             else:
                 kwargs = {"discord_id": discord_id}
-                result = self._status(**kwargs)
+                result = await self.runner.run("status", self._status, **kwargs)
                 return_message = result
 
             await ctx.channel.send(return_message)
@@ -160,7 +225,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
             if len(parsed_command.errors) > 0:
                 return_message = "\n".join(parsed_command.errors)
             else:
-                result = self._new_challenge()
+                result = await self.runner.run("new-challenge", self._new_challenge)
                 return_message = result
 
             await ctx.channel.send(return_message)
@@ -176,7 +241,7 @@ class DiscordUtil(commands.Bot, CommandAbstract):
                 return_message = "\n".join(parsed_command.errors)
             else:
                 kwargs = {"discord_id": discord_id}
-                result = self._user(**kwargs)
+                result = await self.runner.run("user", self._user, **kwargs)
                 return_message = result
 
             await ctx.channel.send(return_message)
@@ -186,16 +251,35 @@ class DiscordUtil(commands.Bot, CommandAbstract):
             if str(ctx.channel.id) != str(self.channel_id):
                 return
             message = await ctx.channel.send("Checking group status...")
+            # Partial summaries are shown while users are fetched
+            progress = ProgressMessage(message, asyncio.get_running_loop())
             return_message = ""
             discord_id = str(ctx.author.id)
             parsed_command = self.parser.parse(ctx.message.content, discord_id)
             if len(parsed_command.errors) > 0:
                 return_message = "\n".join(parsed_command.errors)
             else:
-                result = self._group_status()
+                result = await self.runner.run(
+                    "group-status", self._group_status, on_progress=progress.push
+                )
                 return_message = result
 
-            await message.edit(content=return_message)
+            await progress.finish(return_message)
+
+        @self.command(name="metrics", pass_context=True)
+        async def metrics(ctx: commands.Context):
+            if str(ctx.channel.id) != str(self.channel_id):
+                return
+            return_message = ""
+            discord_id = str(ctx.author.id)
+            parsed_command = self.parser.parse(ctx.message.content, discord_id)
+            if len(parsed_command.errors) > 0:
+                return_message = "\n".join(parsed_command.errors)
+            else:
+                result = await self.runner.run("metrics", self._metrics)
+                return_message = f"```\n{result}\n```"
+
+            await ctx.channel.send(return_message)
 
     def run(self):
         commands.Bot.run(self, self.token)
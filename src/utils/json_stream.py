@@ -0,0 +1,72 @@
+"""
+JSON streaming module
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Yields the elements of the JSON array stored under `key` in a UTF-8 JSON
+    document that arrives in `chunks`, e.g. `response.iter_content()`.
+
+    Only the current chunk and the element being decoded are kept in memory, so
+    memory use doesn't grow with the size of the array. The array of the first
+    occurrence of `"key"` in the document is used, and nothing is yielded if
+    there is none. Chunks after the end of the array are left in `chunks` if it
+    is an iterator. Raises `json.JSONDecodeError` if the document ends before the
+    array does, or if the array is malformed.
+    """
+    chunks = iter(chunks)
+    text = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+
+    # Skip ahead to the opening bracket of the array
+    buffer = ""
+    while True:
+        start = buffer.find(marker)
+        if start == -1:
+            # Keep a tail in case the key is split between two chunks
+            buffer = buffer[-len(marker):]
+        else:
+            bracket = buffer.find("[", start + len(marker))
+            if bracket != -1:
+                buffer = buffer[bracket + 1:]
+                break
+        chunk = next(chunks, None)
+        if chunk is None:
+            if start != -1:
+                raise json.JSONDecodeError("Document ends before the array", buffer, len(buffer))
+            return
+        buffer += text.decode(chunk)
+
+    position = 0
+    exhausted = False
+    while True:
+        while position < len(buffer) and buffer[position] in WHITESPACE + ",":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+            # A number cut off by the end of the chunk decodes too, e.g. `2.` of `2.5`,
+            # so an element only counts once the separator after it has arrived
+            complete = exhausted or (end < len(buffer) and buffer[end] in WHITESPACE + ",]")
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            complete = False
+        if complete:
+            yield element
+            position = end
+            continue
+        chunk = next(chunks, None)
+        exhausted = chunk is None
+        buffer = buffer[position:] + text.decode(chunk or b"", final=exhausted)
+        position = 0
+
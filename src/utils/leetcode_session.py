@@ -0,0 +1,460 @@
+"""
+Leetcode Session module
+"""
+
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
+
+
+class JitterRetry(Retry):
+    """
+    urllib3 retry policy whose exponential backoff is randomized ("equal jitter"),
+    so clients that failed together don't all retry at the same moment
+    """
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+class SocketCountingPool:
+    """
+    Mixin for urllib3 connection pools counting the sockets their connections
+    open. urllib3 reconnects a connection the server closed without creating a
+    new connection object, so `num_connections` misses those handshakes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sockets_opened = 0
+        self.sockets_lock = threading.Lock()
+
+    def _new_conn(self):
+        # Only ever mixed into urllib3 connection pools
+        conn = super()._new_conn()  # pylint: disable=no-member
+        connect = conn.connect
+
+        def counted_connect():
+            with self.sockets_lock:
+                self.sockets_opened += 1
+            connect()
+
+        conn.connect = counted_connect
+        return conn
+
+
+class SocketCountingHTTPConnectionPool(SocketCountingPool, HTTPConnectionPool):
+    """
+    HTTP connection pool counting the sockets it opens
+    """
+
+
+class SocketCountingHTTPSConnectionPool(SocketCountingPool, HTTPSConnectionPool):
+    """
+    HTTPS connection pool counting the sockets it opens
+    """
+
+
+class SocketCountingAdapter(HTTPAdapter):
+    """
+    Transport adapter whose connection pools count the sockets they open
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": SocketCountingHTTPConnectionPool,
+            "https": SocketCountingHTTPSConnectionPool,
+        }
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket limiting requests to `rate` per second on average,
+    with bursts of up to `burst` requests. A rate of 0 disables the limit.
+
+    `pause` stops handing out tokens for a while, e.g. when the server asked us
+    to back off with a `Retry-After` header.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available and takes it
+        """
+        if self.rate <= 0:
+            return
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                self.condition.wait(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hands out no tokens for the next `seconds` seconds
+        """
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def configure(self, rate: float, burst: int) -> None:
+        """
+        Changes the rate and burst, e.g. from the settings once at startup
+        """
+        with self.condition:
+            self.rate = rate
+            self.burst = burst
+            self.tokens = min(self.tokens, float(burst))
+            # Waiting threads recompute their wait with the new rate
+            self.condition.notify_all()
+
+
+# Shared by every LeetcodeSession unless one is given its own, so all requests
+# of the process to Leetcode draw from the same budget
+RATE_LIMITER = TokenBucket()
+
+
+class AdaptiveConcurrency:
+    """
+    Limits the requests in flight, adapting the limit with AIMD: every throttled
+    request halves the limit, every other request raises it by 1/limit, up to
+    `max_limit`.
+    """
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Blocks until fewer than `limit` requests are in flight
+        """
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool) -> None:
+        """
+        Marks a request as done and adapts the limit to whether it was throttled
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.limit / 2, 1.0)
+            else:
+                self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+            self.condition.notify_all()
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised instead of sending a request while the circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests after `failure_threshold` failures in a row, so a
+    Leetcode outage fails commands immediately instead of making each of them
+    wait for timeouts and retries.
+
+    While the breaker is open, a background thread calls `probe` with the URL
+    that tripped it every `probe_interval` seconds. The breaker closes again as
+    soon as a probe succeeds.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[str], bool],
+        failure_threshold: int = 5,
+        probe_interval: float = 30.0,
+    ):
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        # URL of the request that tripped the breaker, None while it is closed
+        self.tripped_by: Optional[str] = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether requests are currently refused
+        """
+        return self.tripped_by is not None
+
+    def check(self) -> None:
+        """
+        Raises CircuitOpenError while the breaker is open
+        """
+        if self.is_open:
+            raise CircuitOpenError("Leetcode is unreachable, requests are paused")
+
+    def record(self, url: str, success: bool) -> None:
+        """
+        Records the outcome of a request, opening the breaker after too many failures
+        """
+        with self.lock:
+            if success:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures < self.failure_threshold or self.is_open:
+                return
+            self.tripped_by = url
+        print(f"Circuit breaker opened after {self.failures} failed requests to {url}")
+        threading.Thread(target=self._probe_until_closed, daemon=True).start()
+
+    def _probe_until_closed(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            if self.probe(self.tripped_by):
+                break
+        with self.lock:
+            self.failures = 0
+            self.tripped_by = None
+        print("Circuit breaker closed, Leetcode answers again")
+
+
+class RequestStats:
+    """
+    Thread safe counters of the requests sent through a `LeetcodeSession`: time
+    spent waiting for the rate limiter, throttled requests and response sizes
+    per query
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {
+            "requests_queued": 0,
+            "queue_wait_ms": 0,
+            "max_queue_wait_ms": 0,
+            "requests_throttled": 0,
+        }
+        # query name -> [responses, total bytes]
+        self.response_sizes: Dict[str, List[int]] = {}
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        Counts a request that waited `seconds` for the rate limiter
+        """
+        wait_ms = int(seconds * 1000)
+        with self.lock:
+            self.counters["requests_queued"] += 1
+            self.counters["queue_wait_ms"] += wait_ms
+            self.counters["max_queue_wait_ms"] = max(self.counters["max_queue_wait_ms"], wait_ms)
+
+    def record_throttled(self) -> None:
+        """
+        Counts a request throttled by Leetcode
+        """
+        with self.lock:
+            self.counters["requests_throttled"] += 1
+
+    def record_response(self, query: str, size: int) -> None:
+        """
+        Counts a response of `size` bytes to a query
+        """
+        with self.lock:
+            sizes = self.response_sizes.setdefault(query, [0, 0])
+            sizes[0] += 1
+            sizes[1] += size
+
+    def limiter_stats(self) -> Dict[str, int]:
+        """
+        Copies the rate limiter counters
+        """
+        with self.lock:
+            return dict(self.counters)
+
+    def response_size_stats(self) -> Dict[str, int]:
+        """
+        Gathers the number of responses and their average size in bytes per query
+        """
+        stats = {}
+        with self.lock:
+            for query, (responses, size) in sorted(self.response_sizes.items()):
+                stats[f"{query}_responses"] = responses
+                stats[f"{query}_avg_bytes"] = size // responses
+        return stats
+
+
+class LeetcodeSession:
+    """
+    A shared HTTP session for all traffic to Leetcode.
+
+    Connections are kept alive in a pool of `pool_size` connections per host, so
+    consecutive requests reuse an open TCP+TLS connection instead of opening a
+    new one. Connection errors, resets and 5xx responses are retried up to
+    `max_retries` times with jittered exponential backoff.
+
+    Every request first takes a token from `limiter` and a slot of at most
+    `pool_size` requests in flight. A 429 response pauses the limiter for the
+    `Retry-After` the server sent, halves the requests in flight and is retried.
+
+    Requests that still fail with a connection error or a 5xx response count
+    towards a `CircuitBreaker`. While it is open, requests raise CircuitOpenError
+    without being sent.
+
+    Keyword Args:
+     - limiter              TokenBucket shared by all requests (default RATE_LIMITER)
+     - failure_threshold    Failed requests in a row that open the breaker (default 5)
+     - probe_interval       Seconds between probes while the breaker is open (default 30)
+    """
+
+    RETRY_STATUSES = [500, 502, 503, 504]
+    THROTTLED_STATUS = 429
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        **kwargs,
+    ):
+        retry = JitterRetry(
+            total=max_retries,
+            status_forcelist=self.RETRY_STATUSES,
+            backoff_factor=backoff_factor,
+            # Hand the last response back instead of raising once retries run out
+            raise_on_status=False,
+            # 429s are paced by the rate limiter instead of sleeping in the connection pool
+            respect_retry_after_header=False,
+        )
+        adapter = SocketCountingAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.adapter = adapter
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.limiter = kwargs.get("limiter") or RATE_LIMITER
+        self.concurrency = AdaptiveConcurrency(pool_size)
+        self.breaker = CircuitBreaker(
+            self._probe,
+            failure_threshold=kwargs.get("failure_threshold", 5),
+            probe_interval=kwargs.get("probe_interval", 30.0),
+        )
+        self.stats = RequestStats()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a GET request through the pooled session, once the rate limiter allows it
+        """
+        retry = self.adapter.max_retries
+        query = self._query_name(url, kwargs.get("json"))
+        for attempt in range(retry.total + 1):
+            self.breaker.check()
+            queued_at = time.monotonic()
+            self.concurrency.acquire()
+            throttled = False
+            try:
+                self.limiter.acquire()
+                self.stats.record_wait(time.monotonic() - queued_at)
+                response = self.session.get(url, **kwargs)
+                # A streamed body is read later by the caller, so go by its header
+                size = (int(response.headers.get("Content-Length") or 0)
+                        if kwargs.get("stream") else len(response.content))
+                self.stats.record_response(query, size)
+                throttled = response.status_code == self.THROTTLED_STATUS
+            except requests.RequestException:
+                self.breaker.record(url, success=False)
+                raise
+            finally:
+                self.concurrency.release(throttled)
+            self.breaker.record(url, success=response.status_code < 500)
+            if not throttled:
+                break
+            self.stats.record_throttled()
+            if attempt < retry.total:
+                # Hand the connection of a streamed response back to the pool
+                response.close()
+                self.limiter.pause(self._retry_after(response, attempt))
+        return response
+
+    def _probe(self, url: str) -> bool:
+        # Any answer short of a server error means Leetcode is back
+        try:
+            self.limiter.acquire()
+            return self.session.get(url, timeout=(3.05, 10)).status_code < 500
+        except requests.RequestException:
+            return False
+
+    def _retry_after(self, response: requests.Response, attempt: int) -> float:
+        try:
+            seconds = self.adapter.max_retries.parse_retry_after(
+                response.headers.get("Retry-After", ""))
+        except InvalidHeader:
+            # Missing or malformed, back off like a failed request
+            seconds = self.adapter.max_retries.backoff_factor * (2 ** attempt)
+        return max(seconds, 0)
+
+    @staticmethod
+    def _query_name(url: str, body: Optional[dict]) -> str:
+        # GraphQL requests are named after their operation, others after their path
+        match = re.search(r"query\s+(\w+)", (body or {}).get("query", ""))
+        if match:
+            return match.group(1)
+        return urlparse(url).path.strip("/").replace("/", "_") or "root"
+
+    def limiter_stats(self) -> Dict[str, int]:
+        """
+        Counts the requests that went through the rate limiter, how long they
+        waited for it in total and at most, and how many were throttled by Leetcode.
+        Also shows whether the circuit breaker is open.
+        """
+        stats = self.stats.limiter_stats()
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        stats["circuit_open"] = int(self.breaker.is_open)
+        return stats
+
+    def response_size_stats(self) -> Dict[str, int]:
+        """
+        Gathers the number of responses and their average size in bytes per
+        GraphQL query (or per path for other requests)
+        """
+        return self.stats.response_size_stats()
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Counts the requests sent and the connections opened so far, reconnects
+        included. Every request beyond the connections opened reused a kept-alive
+        connection and saved a TCP+TLS handshake.
+        """
+        pools = self.adapter.poolmanager.pools
+        requests_sent = 0
+        connections_opened = 0
+        # The pool container refuses plain iteration, but hands out a copy of its keys
+        for pool in filter(None, map(pools.get, pools.keys())):
+            requests_sent += pool.num_requests
+            connections_opened += pool.sockets_opened
+        return {
+            "requests_sent": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": max(requests_sent - connections_opened, 0),
+        }
@@ -2,118 +2,346 @@
 Leetcode Utility module
 """
 
-from typing import List
+import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 import requests
 
 from .query_builder import QueryBuilder
+from .leetcode_session import LeetcodeSession
+from .ttl_cache import TTLCache
+from .json_stream import iter_json_array
 
 class LeetcodeUtil:
     """
     A class for interacting with Leetcode's APIs
     """
 
-    GRAPH_URL = "https://leetcode.com/graphql/"
-    PROBLEM_URL = "https://leetcode.com/problems/"
-    ALL_PROBLEMS_URL = "https://leetcode.com/api/problems/all/"
+    # Bounds of the number of users packed into one recent submissions query
+    MIN_BATCH_SIZE = 1
+    MAX_BATCH_SIZE = 50
+    # Status of a query Leetcode can't run, e.g. one too large
+    REJECTED_STATUS = 400
 
+    BASE_URL = "https://leetcode.com"
 
-    def __init__(self, data_limit=100, timeout=10000):
+    # Bytes of the catalog read at a time while it is parsed
+    CATALOG_CHUNK_SIZE = 64 * 1024
+
+
+    def __init__(self, data_limit=100, timeout=(3.05, 10), **kwargs):
+        """
+        Keyword Args:
+         - pool_size          Number of kept-alive connections to Leetcode (default 10)
+         - max_retries        Retries of failed requests (default 3)
+         - max_workers        Requests sent in parallel when fetching many users (default 8)
+         - batch_size         Initial number of users per recent submissions query (default 10)
+         - rank_cache_ttl     Seconds a user's rank summary is served from cache (default 300)
+         - rank_cache_size    Users whose rank summary is kept in cache (default 1024)
+         - base_url           Leetcode server to talk to, e.g. a local fake server for load tests
+         - failure_threshold  Failed requests in a row that stop requests to Leetcode (default 5)
+         - probe_interval     Seconds between checks whether Leetcode is back (default 30)
+
+        `timeout` is passed to requests: seconds to connect and seconds to wait for data.
+
+        Requests of every instance are rate limited by the process-wide
+        `RATE_LIMITER` of `leetcode_session`, configured once at startup.
+        """
+        self.base_url = kwargs.get("base_url", self.BASE_URL).rstrip("/")
         self.data_limit = data_limit
         self.timeout = timeout
+        self.max_workers = kwargs.get("max_workers", 8)
+        # Grows while batched queries succeed and halves when one fails
+        self.batch_size = kwargs.get("batch_size", 10)
+        self.session = LeetcodeSession(
+            pool_size=kwargs.get("pool_size", 10),
+            max_retries=kwargs.get("max_retries", 3),
+            failure_threshold=kwargs.get("failure_threshold", 5),
+            probe_interval=kwargs.get("probe_interval", 30.0),
+        )
+        self.rank_cache = TTLCache(
+            ttl=kwargs.get("rank_cache_ttl", 300),
+            max_size=kwargs.get("rank_cache_size", 1024),
+        )
+
+    @property
+    def graph_url(self) -> str:
+        """
+        URL of Leetcode's GraphQL API
+        """
+        return f"{self.base_url}/graphql/"
+
+    @property
+    def problem_url(self) -> str:
+        """
+        URL prefix of Leetcode's question pages
+        """
+        return f"{self.base_url}/problems/"
+
+    @property
+    def all_problems_url(self) -> str:
+        """
+        URL of Leetcode's catalog of all questions
+        """
+        return f"{self.base_url}/api/problems/all/"
+
+    def is_available(self) -> bool:
+        """
+        Whether requests are sent to Leetcode, i.e. the circuit breaker is closed
+        """
+        return not self.session.breaker.is_open
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Gathers counters describing the traffic sent to Leetcode
+        """
+        return {
+            **self.session.connection_stats(),
+            **self.session.limiter_stats(),
+            **self.session.response_size_stats(),
+            **self.rank_cache.stats("rank_cache"),
+        }
 
     def api_questions_loadall(self) -> List[dict]:
         """
         Loads all questions from the leetcode API
         """
+        questions, _ = self.api_questions_load_changed()
+        return list(questions or [])
 
-        results = []
-        response = requests.get(self.ALL_PROBLEMS_URL, timeout=self.timeout)
+    def api_questions_load_changed(self, validators: Optional[dict] = None
+                                   ) -> Tuple[Optional[Iterator[dict]], Optional[dict]]:
+        """
+        Loads all questions from the leetcode API, unless they are unchanged since
+        the download `validators` were taken from.
 
-        if response.ok:
-            data = response.json()
-            questions = data['stat_status_pairs']
-            for question in questions:
+        The `etag` and `last_modified` validators are sent as a conditional
+        request, so an unchanged catalog is answered without a body.
+
+        Returns the questions, or None if they are unchanged or the request
+        failed, and the validators of this download, or None if it failed.
+        The questions are parsed one at a time while the catalog downloads, so
+        the whole payload is never held in memory. The `content_hash` of the
+        validators is only set once all the questions were read.
+        """
+        validators = validators or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        response = self.session.get(
+            self.all_problems_url, headers=headers, timeout=self.timeout, stream=True
+        )
+
+        if response.status_code == 304:
+            response.close()
+            return None, validators
+        if not response.ok:
+            print(f"Response returned status code : {response.status_code}")
+            response.close()
+            return None, None
+        new_validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": None,
+        }
+        return self._stream_questions(response, new_validators), new_validators
+
+    def _stream_questions(self, response: requests.Response, validators: dict
+                          ) -> Iterator[dict]:
+        digest = hashlib.sha256()
+
+        def chunks() -> Iterator[bytes]:
+            for chunk in response.iter_content(self.CATALOG_CHUNK_SIZE):
+                digest.update(chunk)
+                yield chunk
+
+        try:
+            body = chunks()
+            for question in iter_json_array(body, "stat_status_pairs"):
                 if question['paid_only']:
                     # Skip paid questions
                     continue
 
                 # Format question into our database schema format for `Leetcode_Question`
-                formatted_question = {
+                yield {
                     "id": question['stat']['question_id'],
                     "title": question['stat']['question__title'],
                     "title_slug": question['stat']['question__title_slug'],
                     "difficulty": question['difficulty']['level'],
                 }
-
-                results.append(formatted_question)
-        else:
-            print(f"Response returned status code : {response.status_code}")
-
-        return results
+            # Hash the rest of the document too
+            for _ in body:
+                pass
+            validators["content_hash"] = digest.hexdigest()
+        finally:
+            response.close()
 
     def get_user_rank(self, leetcode_username: str) -> str:
         """
-        Gathers the provided user's rank
+        Gathers the provided user's rank. Rank summaries are cached for
+        `rank_cache_ttl` seconds, so repeated lookups send no requests. If
+        Leetcode can't be reached, the last known rank is shown, marked as stale.
         """
 
-        rank = ""
-        query = QueryBuilder.query_builder_user_rank(leetcode_username)
-        response = requests.get(self.GRAPH_URL,
-                                json=query, timeout=self.timeout)
-        if response.ok:
-            data = response.json()
-            if len(data) == 0:
-                rank = "Unable to find rank information for Leetcode username" \
+        summary = self.rank_cache.get(leetcode_username)
+        stale_age = None
+        if summary is None:
+            try:
+                summary = self._fetch_rank_summary(leetcode_username)
+            except requests.RequestException as error:
+                stale = self.rank_cache.get_stale(leetcode_username)
+                if stale is None:
+                    if isinstance(error, requests.HTTPError):
+                        return f"Leetcode API Error {error.response.status_code}"
+                    return "Leetcode is unreachable right now, try again later"
+                summary, stale_age = stale
+            if summary is None:
+                return "Unable to find rank information for Leetcode username" \
                     f" `{leetcode_username}`"
-            else:
-                submissions = data["data"]["matchedUser"]["submitStats"]["acSubmissionNum"]
-                submissions_easy = list(
-                    filter(lambda x: x["difficulty"] == "Easy", submissions))
-                submissions_med = list(
-                    filter(lambda x: x["difficulty"] == "Medium", submissions))
-                submissions_hard = list(
-                    filter(lambda x: x["difficulty"] == "Hard", submissions))
-                easy_count = submissions_easy.pop()["count"] if len(
-                    submissions_easy) > 0 else 0
-                med_count = submissions_med.pop()["count"] if len(
-                    submissions_med) > 0 else 0
-                hard_count = submissions_hard.pop()["count"] if len(
-                    submissions_hard) > 0 else 0
-                rank = f"""
+
+        rank = f"""
 Name:                {leetcode_username}
-Ranking:             {data['data']['matchedUser']['profile']['ranking']}
-Contribution Points: {data['data']['matchedUser']['contributions']['points']}
-Easy Challenges:     {easy_count}
-Medium Challenges:   {med_count}
-Hard Challenges:     {hard_count}
+Ranking:             {summary['ranking']}
+Contribution Points: {summary['points']}
+Easy Challenges:     {summary['easy']}
+Medium Challenges:   {summary['medium']}
+Hard Challenges:     {summary['hard']}
 """
-
-        else:
-            rank = f"Leetcode API Error {response.status_code}"
+        if stale_age is not None:
+            rank += f"(Leetcode is unreachable, as of {int(stale_age // 60)} minutes ago)\n"
 
         return rank
 
+    def _fetch_rank_summary(self, leetcode_username: str) -> Optional[Dict[str, int]]:
+        """
+        Requests a user's rank summary and caches it. Returns None for unknown
+        users and raises requests.RequestException if the request failed.
+        """
+        query = QueryBuilder.query_builder_user_rank(leetcode_username)
+        response = self.session.get(self.graph_url,
+                                     json=query, timeout=self.timeout)
+        response.raise_for_status()
+        matched_user = (response.json().get("data") or {}).get("matchedUser")
+        if not matched_user:
+            return None
+        summary = self._parse_rank_summary(matched_user)
+        self.rank_cache.put(leetcode_username, summary)
+        return summary
+
+    @staticmethod
+    def _parse_rank_summary(matched_user: dict) -> Dict[str, int]:
+        """
+        Reduces a `matchedUser` rank response to the numbers shown by `!rank`
+        """
+        counts = {
+            submission["difficulty"]: submission["count"]
+            for submission in matched_user["submitStats"]["acSubmissionNum"]
+        }
+        return {
+            "ranking": matched_user["profile"]["ranking"],
+            "points": matched_user["contributions"]["points"],
+            "easy": counts.get("Easy", 0),
+            "medium": counts.get("Medium", 0),
+            "hard": counts.get("Hard", 0),
+        }
+
     def get_recent_submissions(self,leetcode_username: str) -> list:
         """
-        Gathers the provided user's recent submissions
+        Gathers the provided user's recent submissions. Raises a
+        `requests.RequestException` if Leetcode didn't answer with them, so a
+        failed request isn't mistaken for a user without submissions.
         """
-        recent_completions = []
         query = QueryBuilder.query_builder_recent_stats(leetcode_username, self.data_limit)
-        response = requests.get(self.GRAPH_URL,
-                                json=query, timeout=self.timeout)
-        if response.ok:
-            data = response.json()
-            questions = data['data']['recentAcSubmissionList']
-            for question in questions:
-                completion = {
-                    "title": question["title"],
-                    "title_slug": question["titleSlug"]
-                }
-                recent_completions.append(completion)
-        else:
-            print(f"Response returned status code : {response.status_code}")
+        response = self.session.get(self.graph_url,
+                                     json=query, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        # Unknown users come back as null along with an error
+        questions = (data.get('data') or {}).get('recentAcSubmissionList') or []
+        return self._format_submissions(questions)
+
+    def get_recent_submissions_many(self, leetcode_usernames: List[str]) -> Dict[str, list]:
+        """
+        Gathers the recent submissions of several users. Users are packed
+        `batch_size` at a time into batched queries, and up to `max_workers`
+        batches are in flight at once. Returns the submissions by username.
+        """
+        if len(leetcode_usernames) == 0:
+            return {}
+        size = self.batch_size
+        batches = [
+            leetcode_usernames[start:start + size]
+            for start in range(0, len(leetcode_usernames), size)
+        ]
+        workers = min(self.max_workers, len(batches))
+        submissions = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # `map` yields results in the order of the batches, whatever order they finish in
+            for result in executor.map(self.get_recent_submissions_batch, batches):
+                submissions.update(result)
+        return {username: submissions[username] for username in leetcode_usernames}
+
+    def get_recent_submissions_batch(self, leetcode_usernames: List[str]) -> Dict[str, list]:
+        """
+        Gathers the recent submissions of several users with a single query.
+
+        If Leetcode rejects the whole query, with a 400 or an answer without
+        data, the batch is split in half and each half is retried, down to
+        single-user queries. Users whose part of the response holds an error are
+        fetched again with a single-user query. If Leetcode throttles or fails
+        the query, a `requests.RequestException` is raised instead, since smaller
+        queries wouldn't fare any better.
+        """
+        if len(leetcode_usernames) == 1:
+            return {leetcode_usernames[0]: self.get_recent_submissions(leetcode_usernames[0])}
+
+        query = QueryBuilder.query_builder_recent_stats_batch(leetcode_usernames, self.data_limit)
+        response = self.session.get(self.graph_url,
+                                     json=query, timeout=self.timeout)
+        if not response.ok and response.status_code != self.REJECTED_STATUS:
+            response.raise_for_status()
+        data = response.json().get("data") if response.ok else None
+        if not data:
+            print(f"Batched query of {len(leetcode_usernames)} users failed"
+                  f" with status code : {response.status_code}")
+            self._resize_batches(len(leetcode_usernames), success=False)
+            middle = len(leetcode_usernames) // 2
+            return {
+                **self.get_recent_submissions_batch(leetcode_usernames[:middle]),
+                **self.get_recent_submissions_batch(leetcode_usernames[middle:]),
+            }
+
+        self._resize_batches(len(leetcode_usernames), success=True)
+        submissions = {}
+        for index, username in enumerate(leetcode_usernames):
+            questions = data.get(f"u{index}")
+            if questions is None:
+                submissions[username] = self.get_recent_submissions(username)
+            else:
+                submissions[username] = self._format_submissions(questions)
+        return submissions
 
-        return recent_completions
+    def _resize_batches(self, batch_size: int, success: bool) -> None:
+        # Grow slowly after a full batch succeeds, shrink fast below a batch that failed
+        if success and batch_size >= self.batch_size:
+            self.batch_size = min(self.batch_size + 1, self.MAX_BATCH_SIZE)
+        elif not success:
+            self.batch_size = max(min(self.batch_size, batch_size // 2), self.MIN_BATCH_SIZE)
+
+    @staticmethod
+    def _format_submissions(questions: List[dict]) -> List[dict]:
+        return [
+            {
+                "title": question["title"],
+                "title_slug": question["titleSlug"],
+                # Seconds since the epoch, sent by Leetcode as a string
+                "timestamp": int(question["timestamp"]),
+            }
+            for question in questions
+        ]
 
     def check_challenge_completion(self, leetcode_id: str, title_slug: str) -> bool:
         """
@@ -130,13 +358,13 @@ Hard Challenges:     {hard_count}
         Gather's a published Leetcode question solutions, including code
         """
         query = QueryBuilder.query_builder_solution_by_id(solution_id)
-        response = requests.get(self.GRAPH_URL,
-                                json=query, timeout=self.timeout)
+        response = self.session.get(self.graph_url,
+                                     json=query, timeout=self.timeout)
         solution = ""
         if response.ok:
             response_json = response.json()
             if "errors" in response_json.keys():
-                print("\n".join(response_json["errors"]))
+                print("\n".join(error["message"] for error in response_json["errors"]))
             else:
                 tags = [tag["slug"]
                         for tag in response_json["data"]["topic"]["solutionTags"]]
@@ -147,41 +375,64 @@ Hard Challenges:     {hard_count}
             print(f"Response returned status code : {response.status_code}")
         return solution
 
-    def get_user_solutions(self, leetcode_id: str) -> str:
+    def get_user_solutions(self, leetcode_id: str, max_pages: Optional[int] = None
+                           ) -> Iterator[dict]:
         """
-        Returns a list of all public solutions created by a Leetcode user
+        Yields the public solutions created by a Leetcode user, newest first.
+
+        Solutions are listed `data_limit` per page, up to `max_pages` pages. The
+        code of each solution is fetched by up to `max_workers` requests in
+        parallel, while the next page is being listed.
         """
-        solutions = []
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for page in self._get_user_solution_pages(leetcode_id, max_pages):
+                    # Solutions of earlier pages had the whole page request to finish
+                    ready = len(pending)
+                    pending.extend(
+                        (solution, executor.submit(self.get_solution_by_id, solution["id"]))
+                        for solution in page
+                    )
+                    for _ in range(ready):
+                        solution, future = pending.popleft()
+                        yield {**solution, "code": future.result()}
+                while pending:
+                    solution, future = pending.popleft()
+                    yield {**solution, "code": future.result()}
+            finally:
+                # The caller stopped early, don't fetch code nobody will read
+                for _, future in pending:
+                    future.cancel()
+
+    def _get_user_solution_pages(self, leetcode_id: str, max_pages: Optional[int]
+                                 ) -> Iterator[List[dict]]:
+        skip = 0
+        pages = 0
         next_page = True
-        offset = 0
-        skip = self.data_limit
-        while next_page:
+        while next_page and (max_pages is None or pages < max_pages):
             query = QueryBuilder.query_builder_user_submissions(
-                leetcode_id, offset, skip)
-            response = requests.get(
-                self.GRAPH_URL, json=query, timeout=self.timeout)
-            if response.ok:
-                response_json = response.json()
-                if "errors" in response_json.keys():
-                    print("\n".join(response_json["errors"]))
-                    break
-                data = response_json["data"]
-                next_page = data["userSolutionTopics"]["pageInfo"]["hasNextPage"]
-                edges = data["userSolutionTopics"]["edges"]
-                offset += skip
-                for edge in edges:
-                    solution = {
-                        "id": int(edge["node"]["id"]),
-                        "title": edge["node"]["title"],
-                        "url": edge["node"]["url"],
-                        "questionTitle": edge["node"]["questionTitle"],
-                        "date": edge["node"]["post"]["creationDate"] * 1000
-                    }
-                    solution["code"] = self.get_solution_by_id(
-                        solution["id"])
-                    solutions.append(solution)
-            else:
-                print(
-                    f"Response returned status code : {response.status_code}")
-
-        return solutions
+                leetcode_id, skip, self.data_limit)
+            response = self.session.get(
+                self.graph_url, json=query, timeout=self.timeout)
+            if not response.ok:
+                print(f"Response returned status code : {response.status_code}")
+                return
+            response_json = response.json()
+            if "errors" in response_json.keys():
+                print("\n".join(error["message"] for error in response_json["errors"]))
+                return
+            topics = response_json["data"]["userSolutionTopics"]
+            next_page = topics["pageInfo"]["hasNextPage"]
+            skip += self.data_limit
+            pages += 1
+            yield [
+                {
+                    "id": int(edge["node"]["id"]),
+                    "title": edge["node"]["title"],
+                    "url": edge["node"]["url"],
+                    "questionTitle": edge["node"]["questionTitle"],
+                    "date": edge["node"]["post"]["creationDate"] * 1000
+                }
+                for edge in topics["edges"]
+            ]
@@ -0,0 +1,69 @@
+"""
+Progress Message module
+"""
+
+import asyncio
+from typing import Optional
+
+from discord import Message
+
+
+class ProgressMessage:
+    """
+    Shows the progress of a command by editing a Discord message.
+
+    Content can be pushed from any thread. The message is edited at most once
+    every `min_interval` seconds to stay within Discord's rate limits; content
+    pushed meanwhile replaces the content waiting to be sent, so only the
+    latest version is shown. The final content is sent without waiting.
+    """
+
+    def __init__(self, message: Message, loop: asyncio.AbstractEventLoop,
+                 min_interval: float = 1.0):
+        self.message = message
+        self.loop = loop
+        self.min_interval = min_interval
+        self.pending: Optional[str] = None
+        self.last_edit = float("-inf")
+        self.task: Optional[asyncio.Task] = None
+        self.finishing = asyncio.Event()
+
+    def push(self, content: str) -> None:
+        """
+        Schedules an edit of the message to `content`. Safe to call from any thread.
+        """
+        self.loop.call_soon_threadsafe(self._schedule, content)
+
+    async def finish(self, content: str) -> None:
+        """
+        Edits the message to its final content once any edit being sent is done.
+        Progress pushed before is dropped.
+        """
+        self.finishing.set()
+        self.pending = content
+        self._start_sending()
+        await self.task
+
+    def _schedule(self, content: str) -> None:
+        if self.finishing.is_set():
+            # Progress arriving after the final content is stale
+            return
+        self.pending = content
+        self._start_sending()
+
+    def _start_sending(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = self.loop.create_task(self._send_pending())
+
+    async def _send_pending(self) -> None:
+        while self.pending is not None:
+            delay = self.last_edit + self.min_interval - self.loop.time()
+            if delay > 0 and not self.finishing.is_set():
+                try:
+                    await asyncio.wait_for(self.finishing.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            content, self.pending = self.pending, None
+            await self.message.edit(content=content)
+            self.last_edit = self.loop.time()
@@ -1,6 +1,8 @@
 """
 Query Builder helper class
 """
+from typing import List
+
 class QueryBuilder:
     """
     Query Builder to help build Leetcode queries within leetcode_util.py
@@ -19,7 +21,6 @@ class QueryBuilder:
             "query": """
             query recentAcSubmissions($username: String!, $limit: Int!) {
                 recentAcSubmissionList(username: $username, limit: $limit) {
-                    id
                     title
                     titleSlug
                     timestamp
@@ -33,6 +34,34 @@ class QueryBuilder:
         }
         return query_recent_stats
 
+    @staticmethod
+    def query_builder_recent_stats_batch(leetcode_usernames: List[str], data_limit: int):
+        """
+        Gathers the recent stats of several users in a single query. The list of
+        the i-th user is returned under the alias `u<i>`.
+        """
+        fields = "\n".join(
+            f"""
+                u{index}: recentAcSubmissionList(username: $u{index}, limit: $limit) {{
+                    title
+                    titleSlug
+                    timestamp
+                }}"""
+            for index in range(len(leetcode_usernames))
+        )
+        parameters = "".join(f", $u{index}: String!" for index in range(len(leetcode_usernames)))
+        query_recent_stats = {
+            "query": f"""
+            query recentAcSubmissionsBatch($limit: Int!{parameters}) {{{fields}
+            }}
+        """,
+            "variables": {
+                "limit": data_limit,
+                **{f"u{index}": username for index, username in enumerate(leetcode_usernames)},
+            }
+        }
+        return query_recent_stats
+
     @staticmethod
     def query_builder_user_rank(leetcode_username: str):
         """
@@ -40,22 +69,21 @@ class QueryBuilder:
         """
         query_user_rank = {
             "query": """
-                query getUserProfile($username: String!) { 
-                    allQuestionsCount { 
-                        difficulty count 
-                    } matchedUser(username: $username) { 
-                        contributions { 
-                            points 
-                        } profile { 
-                            reputation ranking 
-                        } submissionCalendar submitStats { 
-                            acSubmissionNum { 
-                                difficulty count submissions 
-                            } totalSubmissionNum { 
-                                difficulty count submissions 
-                            } 
-                        } 
-                    } 
+                query getUserProfile($username: String!) {
+                    matchedUser(username: $username) {
+                        contributions {
+                            points
+                        }
+                        profile {
+                            ranking
+                        }
+                        submitStats {
+                            acSubmissionNum {
+                                difficulty
+                                count
+                            }
+                        }
+                    }
                 }
             """,
             "variables": {
@@ -65,9 +93,10 @@ class QueryBuilder:
         return query_user_rank
 
     @staticmethod
-    def query_builder_user_submissions(leetcode_username: str, offset: int, skip: int):
+    def query_builder_user_submissions(leetcode_username: str, skip: int, first: int):
         """
-        Builds a leetcode query to gather the provided user's submissions
+        Builds a leetcode query to gather a page of the provided user's submissions:
+        `first` submissions after skipping the `skip` newest ones
         """
         query_user_submissions = {
             "query": """
@@ -86,11 +115,9 @@ class QueryBuilder:
                                 id
                                 title
                                 url
-                                viewCount
                                 questionTitle
                                 post {
                                     creationDate
-                                    voteCount
                                 }
                             }
                         }
@@ -101,7 +128,7 @@ class QueryBuilder:
                 "username": leetcode_username,
                 "orderBy": "newest_to_oldest",
                 "skip": skip,
-                "first": offset
+                "first": first
             }
         }
         return query_user_submissions
@@ -114,51 +141,15 @@ class QueryBuilder:
         query_submission = {
             "query": """
                 query communitySolution($topicId: Int!) {
-                    isSolutionTopic(id: $topicId)
                     topic(id: $topicId) {
-                        id
-                        viewCount
-                        topLevelCommentCount
-                        favoriteCount
-                        subscribed
-                        title
-                        pinned
                         solutionTags {
-                            name
                             slug
                         }
-                        hideFromTrending
-                        commentCount
-                        isFavorite
                         post {
-                            id
-                            voteCount
-                            voteStatus
                             content
-                            updationDate
-                            creationDate
-                            status
-                            isHidden
-                        author {
-                            isDiscussAdmin
-                            isDiscussStaff
-                            username
-                            nameColor
-                            activeBadge {
-                                displayName
-                                icon
-                            }
-                            profile {
-                                userAvatar
-                                reputation
-                            }
-                            isActive
                         }
-                        authorIsModerator
-                        isOwnPost
                     }
                 }
-            }
             """,
             "variables": {
                 "topicId": solution_id
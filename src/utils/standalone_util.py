@@ -103,6 +103,12 @@ class StandaloneUtil(CommandAbstract):
         """
         return self.command_util.group_status()
 
+    def _metrics(self) -> str:
+        """
+        Summarizes performance counters of the bot
+        """
+        return self.command_util.metrics()
+
     def _debug(self) -> str:
         """
         Runs a debug routine
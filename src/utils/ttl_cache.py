@@ -0,0 +1,71 @@
+"""
+TTL Cache module
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    A thread safe cache whose entries expire `ttl` seconds after they are stored.
+
+    At most `max_size` entries are kept; storing one more evicts the least
+    recently used entry. Hits and misses are counted for metrics.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (time stored, value), least recently used first
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Loads the value stored under `key`, or None if it is missing or expired
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Loads the value stored under `key` even if it expired, along with its age
+        in seconds. Meant as a fallback when the value can't be refreshed.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            return entry[1], time.monotonic() - entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores a value under `key`, evicting the least recently used entry if full
+        """
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self, prefix: str) -> Dict[str, int]:
+        """
+        Gathers the hit, miss and size counters, with names starting with `prefix`
+        """
+        with self.lock:
+            return {
+                f"{prefix}_hits": self.hits,
+                f"{prefix}_misses": self.misses,
+                f"{prefix}_size": len(self.entries),
+            }